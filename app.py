@@ -3,30 +3,32 @@ import streamlit as st
 
 # Import other necessary libraries
 from streamlit_webrtc import webrtc_streamer, VideoTransformerBase
-import cv2, os, glob
-from ultralytics import YOLO
-import azure.cognitiveservices.speech as speechsdk
-from PIL import Image
-import tempfile
+import av
 from streamlit_audiorecorder import audiorecorder
+from st_keyup import st_keyup
 from io import BytesIO
-import openai
 from pydub import AudioSegment
 from dotenv import load_dotenv
 import os
 import html
 import time
+from detection import DetectionChannel, DetectorConfig, FrameScheduler, LetterDecoder, RoiTracker, SignDetector
+from timings import PIPELINE_STAGES, StageTimings
+import metrics
+from labels import get_label_table
+from catalog import build_thumbnails, load_catalog, thumbnail_bytes
+from vocabulary import load_index, load_vocabulary
+from transcript import to_srt, transcribe_video, video_duration
+from speech import RecognizerPool, SpeechSynthesisService, StreamingTranscriber, azure_recognizer_factory, azure_synthesizer_factory, fake_recognizer_factory
+import audio as audio_pipeline
+import resources
+import markup
+from serving import DETECTION_IMGSZ, DETECTION_ROI_IMGSZ, DETECTION_ROI_MODE, DETECTION_WARMUP_TIMEOUT_S, INFERENCE_RUNTIME, get_inference_backend, get_metrics_server, get_model_path, get_model_timings, get_model_warmup
+from chatbot import FakeStreamingClient, ResponseCache, build_context, history_overflow, render_message, render_stream, stream_reply, summarize_turns
 
 # --- Configuration and Initialization ---
 load_dotenv() # Load environment variables
 
-# Set FFmpeg path (ensure this path is correct for your deployment)
-# This assumes ffmpeg is in a specific relative path. For production, consider adding to PATH or use absolute path.
-AudioSegment.converter = os.path.join(os.getcwd(), "ffmpeg-7.1.1-essentials_build", "ffmpeg-7.1.1-essentials_build", "bin", "ffmpeg.exe")
-if not os.path.exists(AudioSegment.converter):
-    st.error(f"FFmpeg converter not found at: {AudioSegment.converter}. Please check the path and ensure FFmpeg is installed.")
-    st.stop() # Stop the app if ffmpeg is not found
-
 # Azure OpenAI Configuration
 AZURE_OPEN_AI_API_KEY = os.getenv("AZURE_OPEN_AI_API_KEY")
 AZURE_OPEN_AI_ENDPOINT = os.getenv("AZURE_OPEN_AI_ENDPOINT")
@@ -36,25 +38,111 @@ AZURE_OPEN_AI_API_VERSION = os.getenv("AZURE_OPEN_AI_API_VERSION")
 AZURE_SPEECH_KEY = os.getenv("AZURE_SPEECH_KEY")
 AZURE_SPEECH_REGION = os.getenv("AZURE_SPEECH_REGION")
 AZURE_SPEECH_VOICE = os.getenv("AZURE_SPEECH_VOICE", 'id-ID-ArdiNeural') # Default voice for Indonesian
-
-# Initialize Azure OpenAI Client
-openai_client = openai.AzureOpenAI(
-    api_version=AZURE_OPEN_AI_API_VERSION,
-    azure_endpoint=AZURE_OPEN_AI_ENDPOINT,
-    api_key=AZURE_OPEN_AI_API_KEY
-)
-
-# Load YOLO model
-try:
-    model = YOLO("best.pt")
-except Exception as e:
-    st.error(f"Error loading YOLO model: {e}. Ensure 'best.pt' is in the root directory.")
-    st.stop()
-
-# Initialize Azure Speech Config
-speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_SPEECH_REGION)
-speech_config.speech_synthesis_voice_name = AZURE_SPEECH_VOICE
-speech_recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config)
+AZURE_SPEECH_OUTPUT_FORMAT = os.getenv("AZURE_SPEECH_OUTPUT_FORMAT", "Audio16Khz32KBitRateMonoMp3")
+
+# Synthesized speech is cached on disk (LRU, capped at TTS_CACHE_MB) so repeated phrases play without a cloud call
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".tts_cache")
+TTS_CACHE_MB = float(os.getenv("TTS_CACHE_MB", 100))
+
+# Detection scheduling (tune per host: slower CPUs need a higher stride to keep up)
+DETECTION_TARGET_LATENCY_MS = float(os.getenv("DETECTION_TARGET_LATENCY_MS", 40))
+DETECTION_MAX_STRIDE = int(os.getenv("DETECTION_MAX_STRIDE", 6))
+DETECTION_MAX_FRAME_AGE_MS = float(os.getenv("DETECTION_MAX_FRAME_AGE_MS", 250))
+
+# Hand ROI mode: after a detection, infer on a padded crop around the hand at a smaller size
+# (DETECTION_IMGSZ, DETECTION_ROI_MODE and DETECTION_ROI_IMGSZ are read in serving.py, which warms up those sizes)
+DETECTION_FULL_SCAN_EVERY = int(os.getenv("DETECTION_FULL_SCAN_EVERY", 15))
+
+# Post-processing: keep the DETECTION_TOP_K most confident boxes (0 = all), optionally after
+# class-agnostic NMS at this IoU (0 = off), and only the letters in DETECTION_CLASSES (e.g. "A,B,C"; empty = all)
+DETECTION_TOP_K = int(os.getenv("DETECTION_TOP_K", 5))
+DETECTION_AGNOSTIC_NMS_IOU = float(os.getenv("DETECTION_AGNOSTIC_NMS_IOU", 0))
+DETECTION_CLASSES = [letter.strip().upper() for letter in os.getenv("DETECTION_CLASSES", "").split(",") if letter.strip()]
+
+# Letter decoding: a letter must lead the last DECODER_WINDOW inferences for DECODER_MIN_DWELL_MS before it is added
+DECODER_WINDOW = int(os.getenv("DECODER_WINDOW", 8))
+DECODER_MIN_DWELL_MS = float(os.getenv("DECODER_MIN_DWELL_MS", 400))
+DECODER_VOTE_RATIO = float(os.getenv("DECODER_VOTE_RATIO", 0.6))
+DECODER_MIN_CONF = float(os.getenv("DECODER_MIN_CONF", 0.7))
+
+# How often the detection page pulls new text/stats from the video thread
+DETECTION_UI_REFRESH_S = float(os.getenv("DETECTION_UI_REFRESH_S", 0.5))
+
+# Recorded-video transcription: frames sampled per second of video, and frames per inference batch
+TRANSCRIPT_SAMPLE_FPS = float(os.getenv("TRANSCRIPT_SAMPLE_FPS", 10))
+TRANSCRIPT_BATCH_SIZE = int(os.getenv("TRANSCRIPT_BATCH_SIZE", 16))
+
+# Example images per letter: persistent index of the dataset, ranked "largest" (hand size) or "centered"
+CATALOG_RANK = os.getenv("CATALOG_RANK", "largest")
+CATALOG_CACHE_DIR = os.getenv("CATALOG_CACHE_DIR", ".catalog_cache")
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", 192))
+
+# Kamus search vocabulary: every letter the model knows, plus word signs listed in this JSON file (if present)
+SIGN_VOCABULARY_PATH = os.getenv("SIGN_VOCABULARY_PATH", "vocabulary.json")
+# Pause in typing before the Kamus search box sends its text
+DICTIONARY_SEARCH_DEBOUNCE_MS = int(os.getenv("DICTIONARY_SEARCH_DEBOUNCE_MS", 250))
+
+# Chatbot answer cache: near-duplicate questions (trigram similarity >= threshold) reuse a stored answer
+CHATBOT_CACHE_PATH = os.getenv("CHATBOT_CACHE_PATH", ".chatbot_cache/responses.json")
+CHATBOT_CACHE_THRESHOLD = float(os.getenv("CHATBOT_CACHE_THRESHOLD", 0.85))
+CHATBOT_CACHE_TTL_H = float(os.getenv("CHATBOT_CACHE_TTL_H", 168))
+CHATBOT_CACHE_SIZE = int(os.getenv("CHATBOT_CACHE_SIZE", 512))
+
+# Chatbot prompt size: token budget for system prompt + summary + history sent per request,
+# and how many messages a session keeps before the oldest are folded into a summary
+CHATBOT_CONTEXT_TOKENS = int(os.getenv("CHATBOT_CONTEXT_TOKENS", 1500))
+CHATBOT_HISTORY_LIMIT = int(os.getenv("CHATBOT_HISTORY_LIMIT", 20))
+CHATBOT_SUMMARY_TOKENS = int(os.getenv("CHATBOT_SUMMARY_TOKENS", 150))
+
+# --- Lazy resources ---
+# Heavy clients and the model are not built at import time (this script re-runs on every
+# interaction). Each get_* factory runs on first use by the page that needs it, e.g. torch
+# is only imported when someone opens the detection page, and the result is shared by all
+# sessions through st.cache_resource. resources.build_times() has how long each one took.
+# The model, inference backend, warm-up and metrics server are built in serving.py instead,
+# so launch.py can start them before the first session arrives.
+
+# Azure OpenAI client (CHATBOT_FAKE_STREAM=1 swaps in a local fake streaming endpoint for testing)
+@st.cache_resource(show_spinner=False)
+@resources.timed("openai_client")
+def get_openai_client():
+    if os.getenv("CHATBOT_FAKE_STREAM") == "1":
+        return FakeStreamingClient("Ini adalah jawaban uji dari endpoint streaming lokal. SIBI adalah Sistem Isyarat Bahasa Indonesia.")
+    import openai
+
+    return openai.AzureOpenAI(
+        api_version=AZURE_OPEN_AI_API_VERSION,
+        azure_endpoint=AZURE_OPEN_AI_ENDPOINT,
+        api_key=AZURE_OPEN_AI_API_KEY
+    )
+
+# One answer cache for all sessions, reloaded from disk on restart
+@st.cache_resource(show_spinner=False)
+@resources.timed("response_cache")
+def get_response_cache():
+    return ResponseCache(CHATBOT_CACHE_PATH, CHATBOT_CACHE_THRESHOLD, CHATBOT_CACHE_TTL_H * 3600, CHATBOT_CACHE_SIZE)
+
+# Azure Speech config, shared by recognition and synthesis
+@st.cache_resource(show_spinner=False)
+@resources.timed("speech_config")
+def get_speech_config():
+    import azure.cognitiveservices.speech as speechsdk
+
+    speech_config = speechsdk.SpeechConfig(subscription=AZURE_SPEECH_KEY, region=AZURE_SPEECH_REGION)
+    speech_config.speech_synthesis_voice_name = AZURE_SPEECH_VOICE
+    return speech_config
+
+# Text to speech for every session: one reused synthesizer behind the on-disk audio cache
+@st.cache_resource(show_spinner=False)
+@resources.timed("tts_service")
+def get_tts_service():
+    return SpeechSynthesisService(
+        azure_synthesizer_factory(get_speech_config(), AZURE_SPEECH_OUTPUT_FORMAT),
+        AZURE_SPEECH_VOICE,
+        AZURE_SPEECH_OUTPUT_FORMAT,
+        TTS_CACHE_DIR,
+        int(TTS_CACHE_MB * 2**20)
+    )
 
 # Set Streamlit page configuration
 st.set_page_config(
@@ -64,68 +152,74 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# No-op when launch.py already started it; otherwise (plain `streamlit run app.py`) the first session does.
+# The model warm-up is left to detection_page, so other pages never import torch/ultralytics.
+get_metrics_server()
+
 # --- Helper Functions ---
-# Mapping class index to letters A-Y (without J, Z)
-# Mapping class index to letters A-Y (without J, Z)
-def get_class_mapping():
-    import string
-    letters = [c for c in string.ascii_uppercase if c not in ['J', 'Z']]
-    return {i: l for i, l in enumerate(letters)}
-
-# Load example images from dataset
-@st.cache_data
-def load_label_images(dataset_folder="train"):
-    label_map = {}
-    label_folder = os.path.join(dataset_folder, "labels")
-    image_folder = os.path.join(dataset_folder, "images")
-
-    for label_file in glob.glob(os.path.join(label_folder, "*.txt")):
-        with open(label_file, 'r') as f:
-            lines = f.readlines()
-            if not lines: continue
-            class_id = lines[0].split()[0]
-            if class_id not in label_map:
-                img_name = os.path.basename(label_file).replace(".txt", ".jpg")
-                img_path = os.path.join(image_folder, img_name)
-                if os.path.exists(img_path):
-                    label_map[class_id] = img_path
-    return label_map
+# Class index <-> letter table (A-Y without J, Z), read once from data.yaml `names`
+LABELS = get_label_table("data.yaml")
+
+# Example thumbnail per class (best-ranked example from the persisted catalog, cropped to grid size once)
+def load_label_thumbnails(dataset_folder="train"):
+    catalog = load_catalog(dataset_folder, CATALOG_RANK, cache_dir=CATALOG_CACHE_DIR)
+    return build_thumbnails(catalog, CATALOG_CACHE_DIR, THUMBNAIL_SIZE)
+
+# Kamus search index (trie + trigrams), rebuilt only when the vocabulary file changes
+@st.cache_resource(show_spinner=False)
+def get_search_index(vocabulary_mtime):
+    return load_index(load_vocabulary(LABELS, SIGN_VOCABULARY_PATH), CATALOG_CACHE_DIR)
+
+def search_index():
+    try:
+        mtime = os.path.getmtime(SIGN_VOCABULARY_PATH)
+    except OSError:
+        mtime = None
+    return get_search_index(mtime)
 
 # Webcam Real-Time Detection
-class SignLanguageDetector(VideoTransformerBase):
-    def _init_(self):
-        self.detected_text = ""
-        self.last_label = ""
-
-    def transform(self, frame):
-        img = frame.to_ndarray(format="bgr24")
-        img = cv2.flip(img, 1)  # mirror
-        results = model.predict(img, imgsz=640, conf=st.session_state.get("detection_threshold", 0.6), verbose=False)[0]
-
-        for box in results.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            cls = int(box.cls[0])
-            label = get_class_mapping().get(cls, "?")
-
-            if label != self.last_label:
-                self.detected_text += label
-                self.last_label = label
-
-            # Warna ungu (BGR: 255, 0, 255), dan ketebalan garis 4
-            cv2.rectangle(img, (x1, y1), (x2, y2), (255, 0, 255), 4)
-
-            # Ukuran font diperbesar (1.5) dan ketebalan teks ditingkatkan (3)
-            cv2.putText(img, label, (x1, y1 - 20), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 0, 255), 3)
-
-        if len(results.boxes) == 0:
-            self.last_label = ""
-
-        return img
+class SignLanguageDetector(SignDetector, VideoTransformerBase):
+    def __init__(self, channel=None, config=None):
+        # Runs on the WebRTC worker thread; the per-frame pipeline lives in detection.SignDetector
+        super().__init__(
+            get_inference_backend(),
+            LABELS,
+            LetterDecoder(LABELS.by_index, DECODER_WINDOW, DECODER_MIN_DWELL_MS / 1000, DECODER_VOTE_RATIO, DECODER_MIN_CONF),
+            FrameScheduler(DETECTION_TARGET_LATENCY_MS, DETECTION_MAX_STRIDE, DETECTION_MAX_FRAME_AGE_MS, sink=metrics.observe_drop),
+            RoiTracker(DETECTION_ROI_IMGSZ, DETECTION_FULL_SCAN_EVERY) if DETECTION_ROI_MODE else None,
+            DETECTION_IMGSZ,
+            channel,
+            config,
+            StageTimings(sink=metrics.observe_stage),
+            DETECTION_UI_REFRESH_S,
+            classes=[LABELS.index(letter) for letter in DETECTION_CLASSES if LABELS.index(letter) is not None] or None,
+            top_k=DETECTION_TOP_K,
+            agnostic_iou=DETECTION_AGNOSTIC_NMS_IOU,
+        )
+        self.backend.register()
+        metrics.ACTIVE_SESSIONS.inc()
+
+    def on_ended(self):
+        self.backend.unregister()
+        metrics.ACTIVE_SESSIONS.dec()
+
+    async def recv_queued(self, frames):
+        # Frames that piled up while the previous one was processed are already stale; only the newest is shown
+        self.scheduler.record_dropped(len(frames) - 1, "queued")
+        frame = frames[-1]
+        img = self.transform(frame)
+        # The annotated buffer is reused for the next frame; from_ndarray copies it into the frame the encoder keeps
+        started = time.perf_counter()
+        new_frame = av.VideoFrame.from_ndarray(img, format="bgr24")
+        new_frame.pts = frame.pts
+        new_frame.time_base = frame.time_base
+        self.timings.record("encode", time.perf_counter() - started)
+        return [new_frame]
 
 # --- Modern CSS Styling ---
+# The <style> block is read and built once per process (markup.py), not on every rerun
 def local_css(file_name):
-    with open(file_name) as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    st.markdown(markup.stylesheet(file_name), unsafe_allow_html=True)
 
 local_css("style.css") # Load our custom stylesheet
 
@@ -140,10 +234,26 @@ if 'detected_text' not in st.session_state:
     st.session_state.detected_text = ""
 if 'chatbot_messages' not in st.session_state:
     st.session_state.chatbot_messages = [{"role": "assistant", "content": "Halo! Saya InSignia Bot, siap membantu Anda belajar dan berkomunikasi tentang Bahasa Isyarat SIBI. Ada yang bisa saya bantu?"}]
+if 'chatbot_html' not in st.session_state:
+    st.session_state.chatbot_html = [render_message(message) for message in st.session_state.chatbot_messages]
+if 'chatbot_summary' not in st.session_state:
+    st.session_state.chatbot_summary = ""
 if 'show_fps_camera' not in st.session_state:
     st.session_state.show_fps_camera = True
 if 'detection_threshold' not in st.session_state:
     st.session_state.detection_threshold = 0.6
+if 'detection_channel' not in st.session_state:
+    st.session_state.detection_channel = DetectionChannel()
+if 'detection_cleared_seq' not in st.session_state:
+    st.session_state.detection_cleared_seq = -1
+if 'detector_config' not in st.session_state:
+    st.session_state.detector_config = DetectorConfig(st.session_state.detection_threshold, st.session_state.show_fps_camera)
+
+# --- Navigation ---
+# Buttons switch pages through on_click callbacks, which run before the script does: a click
+# costs one script run that already renders the new page, instead of a run plus st.rerun()
+def go_to(page):
+    st.session_state.current_page = page
 
 with st.sidebar:
     # Logo and App Title
@@ -159,23 +269,20 @@ with st.sidebar:
     
     # Navigation Menu
     menu_items = [
-        {"icon": "🏠", "label": "Beranda", "key": "home"},
-        {"icon": "🌟", "label": "Fitur Unggulan", "key": "features"},
-        {"icon": "📷", "label": "Deteksi SIBI", "key": "detection"},
-        {"icon": "📚", "label": "Kamus SIBI", "key": "dictionary"},
-        {"icon": "🎤", "label": "Speech to SIBI", "key": "speech"},
-        {"icon": "💬", "label": "Chatbot", "key": "chatbot"}
+        {"icon": "🏠", "label": "Beranda", "key": "home", "page": "🏠 Beranda"},
+        {"icon": "🌟", "label": "Fitur Unggulan", "key": "features", "page": "🌟 Fitur Unggulan"},
+        {"icon": "📷", "label": "Deteksi SIBI", "key": "detection", "page": "📷 Deteksi"},
+        {"icon": "📚", "label": "Kamus SIBI", "key": "dictionary", "page": "📚 Kamus"},
+        {"icon": "🎤", "label": "Speech to SIBI", "key": "speech", "page": "🎤 Speech to Visual"},
+        {"icon": "💬", "label": "Chatbot", "key": "chatbot", "page": "💬 Chatbot"}
     ]
     
-    selected_page = st.session_state.current_page.split()[-1]
-    
     for item in menu_items:
-        if st.button(f"{item['icon']} {item['label']}", 
-                    key=item['key'],
-                    use_container_width=True,
-                    type="primary" if selected_page == item['label'] else "secondary"):
-            st.session_state.current_page = f"{item['icon']} {item['label']}"
-            st.rerun()
+        st.button(f"{item['icon']} {item['label']}", 
+                  key=item['key'],
+                  use_container_width=True,
+                  type="primary" if st.session_state.current_page == item['page'] else "secondary",
+                  on_click=go_to, args=(item['page'],))
     
     st.markdown("---")
     
@@ -220,9 +327,7 @@ def landing_page():
         """, unsafe_allow_html=True)
         
         st.markdown("<div style='margin-top: 3rem;'>", unsafe_allow_html=True)
-        if st.button("🚀 Mulai jelajahi InSignia", key="start_button_landing", use_container_width=True, type="primary"):
-            st.session_state.current_page = "🌟 Fitur Unggulan"
-            st.rerun()
+        st.button("🚀 Mulai jelajahi InSignia", key="start_button_landing", use_container_width=True, type="primary", on_click=go_to, args=("🌟 Fitur Unggulan",))
         st.markdown("</div>", unsafe_allow_html=True)
     
     with col2:
@@ -280,22 +385,8 @@ def landing_page():
         """, unsafe_allow_html=True)
 
         st.markdown("<div class='how-it-works-grid features-grid'>", unsafe_allow_html=True)
-        cols = st.columns(3)
-        features = [
-            {"icon": "⚡", "title": "Deteksi Real-time", "desc": "Mendeteksi dan menerjemahkan Bahasa Isyarat SIBI secara instan dengan model YOLO terbaru, memberikan respons cepat untuk komunikasi yang lancar."},
-            {"icon": "🤖", "title": "Kecerdasan Buatan Canggih", "desc": "Ditenagai oleh teknologi AI mutakhir dari Azure, memastikan akurasi dan keandalan yang luar biasa dalam setiap terjemahan."},
-            {"icon": "🌐", "title": "Solusi Multi-Modal", "desc": "Mendukung input visual (kamera), suara (mikrofon), dan teks, serta dilengkapi Chatbot interaktif untuk pengalaman komunikasi yang komprehensif."}
-        ]
-        
-        for i, feature in enumerate(features):
-            with cols[i]:
-                st.markdown(f"""
-                <div class="card">
-                    <div style="font-size: 3rem; margin-bottom: 1.5rem; color: var(--primary);">{feature['icon']}</div>
-                    <h3>{feature['title']}</h3>
-                    <p style="line-height: 1.7; color: var(--text-light); opacity: 0.9;">{feature['desc']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+        for col, card in zip(st.columns(3), markup.LANDING_FEATURE_CARDS):
+            col.markdown(card, unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
@@ -309,24 +400,8 @@ def landing_page():
         """, unsafe_allow_html=True)
 
         st.markdown("<div class='how-it-works-grid'>", unsafe_allow_html=True)
-        steps = st.columns(3)
-        step_data = [
-            {"num": "1", "title": "Input", "desc": "Pengguna memasukkan bahasa isyarat melalui kamera atau suara melalui mikrofon."},
-            {"num": "2", "title": "Proses AI", "desc": "Sistem AI canggih kami mengenali isyarat visual atau ucapan, lalu menerjemahkannya secara cerdas."},
-            {"num": "3", "title": "Output", "desc": "Hasil terjemahan ditampilkan secara instan dalam format teks yang mudah dipahami atau visual isyarat."}
-        ]
-        
-        for i, step in enumerate(step_data):
-            with steps[i]:
-                st.markdown(f"""
-                <div class="card">
-                    <div style="background: var(--primary-light); width: 70px; height: 70px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-bottom: 1.5rem; color: var(--white); font-size: 2rem; font-weight: bold; box-shadow: 0 5px 15px rgba(var(--primary-light-rgb), 0.3);">
-                        {step['num']}
-                    </div>
-                    <h3>{step['title']}</h3>
-                    <p style="line-height: 1.7; color: var(--text-light); opacity: 0.9;">{step['desc']}</p>
-                </div>
-                """, unsafe_allow_html=True)
+        for col, card in zip(st.columns(3), markup.LANDING_STEP_CARDS):
+            col.markdown(card, unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
@@ -340,26 +415,8 @@ def landing_page():
         """, unsafe_allow_html=True)
 
         st.markdown("<div class='how-it-works-grid'>", unsafe_allow_html=True)
-        testimonials_cols = st.columns(3)
-        testimonial_data = [
-            {"name": "Budi Santoso", "role": "Guru SLB", "quote": "InSignia sangat membantu siswa saya dalam belajar bahasa isyarat. Prosesnya jadi lebih interaktif dan menyenangkan, mendorong mereka untuk lebih aktif berkomunikasi. Benar-benar alat yang revolusioner di kelas."},
-            {"name": "Siti Aminah", "role": "Profesional HRD", "quote": "Sebagai HRD, saya sangat menghargai kemudahan komunikasi dengan rekan tuli di perusahaan. Antarmuka InSignia yang intuitif telah meningkatkan inklusivitas dan kolaborasi tim secara signifikan."},
-            {"name": "Dr. Rina Dewi", "role": "Dokter Umum", "quote": "Memberikan pelayanan kesehatan yang inklusif adalah prioritas. InSignia adalah alat vital yang memungkinkan saya berinteraksi lebih efektif dengan pasien tunarungu, memastikan mereka mendapatkan penanganan yang layak dan nyaman."}
-        ]
-        
-        for i, testimonial in enumerate(testimonial_data):
-            with testimonials_cols[i]:
-                st.markdown(f"""
-                <div class="testimonial card">
-                    <p style="font-style: italic; margin-bottom: 1.5rem; line-height: 1.7; color: var(--text-color);">
-                        "{testimonial['quote']}"
-                    </p>
-                    <div>
-                        <p style="font-weight: bold; color: var(--primary); margin-bottom: 0.25rem; font-size: 1.1rem;">{testimonial['name']}</p>
-                        <p style="font-size: 0.95rem; color: var(--text-light); opacity: 0.8;">{testimonial['role']}</p>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
+        for col, card in zip(st.columns(3), markup.LANDING_TESTIMONIAL_CARDS):
+            col.markdown(card, unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
@@ -376,9 +433,7 @@ def landing_page():
 
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
-            if st.button("🚀 Mulai Sekarang", key="start_button_cta", use_container_width=True, type="primary"):
-                st.session_state.current_page = "🌟 Fitur Unggulan"
-                st.rerun()
+            st.button("🚀 Mulai Sekarang", key="start_button_cta", use_container_width=True, type="primary", on_click=go_to, args=("🌟 Fitur Unggulan",))
             st.markdown("<p style='text-align: center; margin-top: 1rem; font-size: 0.9rem; color: var(--text-light);'>Tidak perlu instalasi, langsung akses dari browser Anda.</p>", unsafe_allow_html=True)
 
 def features_page():
@@ -389,42 +444,114 @@ def features_page():
     </div>
     """, unsafe_allow_html=True)
 
-    feature_data = [
-        {"icon": "📷", "title": "Deteksi Real-time", "description": "Deteksi Bahasa Isyarat SIBI secara langsung melalui kamera perangkat Anda dengan akurasi tinggi, mengubah isyarat menjadi teks secara instan.", "key": "open_detect", "page": "📷 Deteksi", "color": "#4A63E0"}, # primary
-        {"icon": "📚", "title": "Kamus SIBI Interaktif", "description": "Pelajari Bahasa Isyarat SIBI dengan panduan visual lengkap, ilustrasi interaktif, dan contoh penggunaan untuk memperkaya pemahaman Anda.", "key": "open_dict", "page": "📚 Kamus", "color": "#EE5F8E"}, # secondary
-        {"icon": "🎤", "title": "Speech to Visual", "description": "Konversikan ucapan Anda menjadi visual Bahasa Isyarat SIBI, memungkinkan komunikasi dua arah yang lancar antara pengguna bahasa isyarat dan teman bicara mereka.", "key": "open_speech", "page": "🎤 Speech to Visual", "color": "#7209B7"}, # purple
-        {"icon": "💬", "title": "Chatbot InSignia", "description": "Dapatkan bantuan instan, informasi mendalam, dan panduan praktis seputar Bahasa Isyarat SIBI dan komunikasi inklusif dari chatbot cerdas kami.", "key": "open_chat", "page": "💬 Chatbot", "color": "#FFD23F"} # accent
-    ]
-
     st.markdown("<div class='how-it-works-grid features-grid'>", unsafe_allow_html=True)
-    rows = [feature_data[i:i + 2] for i in range(0, len(feature_data), 2)]
-    for row in rows:
+    for start in range(0, len(markup.FEATURE_PAGES), 2):
+        row = markup.FEATURE_PAGES[start:start + 2]
         cols = st.columns(len(row))
         for i, feature in enumerate(row):
             with cols[i]:
-                st.markdown(f"""
-                <div class="card" style="border-top: 5px solid {feature['color']};">
-                    <div style="font-size: 3rem; margin-bottom: 1.5rem; color: {feature['color']};">{feature['icon']}</div>
-                    <h3>{feature['title']}</h3>
-                    <p style="margin-bottom: 1.5rem; color: var(--text-light); line-height: 1.7;">{feature['description']}</p>
-                    <div style="margin-top: auto; width: 100%;"> </div>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(markup.FEATURE_PAGE_CARDS[start + i], unsafe_allow_html=True)
                 # The button is intentionally placed outside the markdown string to ensure Streamlit renders it as a proper widget.
-                if st.button(f"Buka {feature['title'].split(' ')[0]}", key=feature['key'], use_container_width=True, type="primary"):
-                    st.session_state.current_page = feature['page']
-                    st.rerun()
+                st.button(f"Buka {feature['title'].split(' ')[0]}", key=feature['key'], use_container_width=True, type="primary", on_click=go_to, args=(feature['page'],))
     st.markdown("</div>", unsafe_allow_html=True)
 
     st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
-    if st.button("← Kembali ke Beranda", key="back_features_page_bottom", use_container_width=True, type="secondary"):
-        st.session_state.current_page = "🏠 Beranda"
-        st.rerun()
+    st.button("← Kembali ke Beranda", key="back_features_page_bottom", use_container_width=True, type="secondary", on_click=go_to, args=("🏠 Beranda",))
+
+# Live panels on the detection page: only these fragments rerun on the timer, not the whole page
+@st.fragment(run_every=DETECTION_UI_REFRESH_S)
+def live_stats_panel(ctx):
+    if not ctx.state.playing:
+        st.warning("⚠ Kamera belum diaktifkan. Klik 'START' untuk memulai deteksi.", icon="⚠")
+        return
+
+    st.success("✅ Kamera aktif, deteksi sedang berjalan!", icon="🎉")
+    detector = ctx.video_transformer
+    if not detector:
+        return
+    stats = detector.scheduler.stats()
+    stride_col, latency_col, infer_col, drop_col = st.columns(4)
+    stride_col.metric("Stride Inferensi", f"1/{stats['stride']}")
+    latency_col.metric("Latensi per Frame", f"{stats['latency_ms']:.0f} ms", help=f"Target: {stats['target_latency_ms']:.0f} ms")
+    infer_col.metric("Waktu Inferensi", f"{stats['inference_ms']:.0f} ms")
+    drop_col.metric("Frame Dilewati", stats['dropped'])
+    if detector.roi:
+        roi_stats = detector.roi.stats()
+        st.caption(f"Mode ROI tangan: {'melacak' if roi_stats['tracking'] else 'memindai penuh'} · {roi_stats['roi_share']:.0%} inferensi pada crop {DETECTION_ROI_IMGSZ}px")
+    backend_stats = get_inference_backend().stats()
+    model_path, model_runtime, model_export_error = get_model_path()
+    st.caption(f"Runtime model: {model_runtime}" + (f" (ekspor {INFERENCE_RUNTIME} gagal: {model_export_error})" if model_export_error else ""))
+    if "workers" in backend_stats:
+        st.caption(f"Sesi aktif: {backend_stats['active_sessions']} · Worker proses: {backend_stats['workers']}")
+    else:
+        st.caption(f"Sesi aktif: {backend_stats['active_sessions']} · Rata-rata batch: {backend_stats['mean_batch']:.1f} frame")
+
+    with st.expander("⏱ Waktu per Tahap", expanded=False):
+        # Session stages, with the model's preprocess/inference/NMS split from the shared backend
+        stage_stats = {**detector.timings.stats(), **get_model_timings().stats()}
+        st.table([
+            {"Tahap": stage, "p50 (ms)": f"{row['p50_ms']:.1f}", "p95 (ms)": f"{row['p95_ms']:.1f}", "p99 (ms)": f"{row['p99_ms']:.1f}", "Frame": row["count"]}
+            for stage in PIPELINE_STAGES if (row := stage_stats.get(stage))
+        ])
+
+@st.fragment(run_every=DETECTION_UI_REFRESH_S)
+def live_text_panel(channel, config):
+    event = channel.latest()
+    if event and event.seq > st.session_state.detection_cleared_seq:
+        st.session_state.detected_sign_text = event.text
+        tentative = event.tentative
+    else:
+        st.session_state.detected_sign_text = ""
+        tentative = ""
+
+    st.markdown(f"""
+    <div class="card" style="padding: 1rem;">
+        <p style="margin: 0; font-weight: 500;">Teks Terdeteksi:</p>
+        <p style="margin: 0; font-size: 1.8rem; font-weight: 700; letter-spacing: 0.1em; word-break: break-all;">
+            {html.escape(st.session_state.detected_sign_text) or "&nbsp;"}<span style="opacity: 0.35;">{html.escape(tentative)}</span>
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if st.button("🗑 Hapus Teks Deteksi", key="clear_detected_text", use_container_width=True):
+        # The detector clears its decoder on the next frame; until then hide everything published so far
+        config.request_reset()
+        latest = channel.latest()
+        st.session_state.detection_cleared_seq = latest.seq if latest else -1
+        st.session_state.detected_sign_text = ""
+
+    if st.session_state.detected_sign_text:
+        if st.button("Terjemahkan ke Suara (Preview)", key="translate_to_speech", use_container_width=True):
+            text_to_speak = st.session_state.detected_sign_text
+            if text_to_speak:
+                with st.spinner("Mengonversi teks ke suara..."):
+                    try:
+                        # Audio comes back as bytes and plays in the user's browser
+                        st.session_state.tts_audio = get_tts_service().synthesize(text_to_speak)
+                    except Exception as e:
+                        st.session_state.tts_audio = None
+                        st.error(f"Error dalam konversi teks ke suara: {e}")
+            else:
+                st.warning("Tidak ada teks untuk diterjemahkan ke suara.")
+    else:
+        st.session_state.tts_audio = None
+
+    # Kept in session state so the player survives this fragment's timed reruns
+    if st.session_state.get("tts_audio"):
+        st.audio(st.session_state.tts_audio, format=get_tts_service().mime_type, autoplay=True)
+
+# Settings changes rerun only this block, not the camera component and panels around it
+@st.fragment
+def detection_settings_panel():
+    with st.expander("⚙ Pengaturan Deteksi Kamera", expanded=False):
+        st.session_state.show_fps_camera = st.checkbox("Tampilkan FPS di Kamera", value=st.session_state.show_fps_camera)
+        st.session_state.detection_threshold = st.slider("Threshold Deteksi (Confidence)", 0.0, 1.0, st.session_state.detection_threshold, 0.05)
+        st.info("Atur threshold untuk menyesuaikan sensitivitas deteksi. Nilai lebih tinggi mengurangi deteksi palsu.", icon="ℹ")
+    # Hand the new values to the running detector without it reading session state
+    st.session_state.detector_config.update(threshold=st.session_state.detection_threshold, show_fps=st.session_state.show_fps_camera)
 
 def detection_page():
-    if st.button("← Kembali", key="back_from_detection", type="secondary"):
-        st.session_state.current_page = "🌟 Fitur Unggulan"
-        st.rerun()
+    st.button("← Kembali", key="back_from_detection", type="secondary", on_click=go_to, args=("🌟 Fitur Unggulan",))
     
     with st.container():
         st.markdown("""
@@ -434,17 +561,31 @@ def detection_page():
         </div>
         """, unsafe_allow_html=True)
 
-        with st.expander("⚙ Pengaturan Deteksi Kamera", expanded=False):
-            st.session_state.show_fps_camera = st.checkbox("Tampilkan FPS di Kamera", value=st.session_state.show_fps_camera)
-            st.session_state.detection_threshold = st.slider("Threshold Deteksi (Confidence)", 0.0, 1.0, st.session_state.detection_threshold, 0.05)
-            st.info("Atur threshold untuk menyesuaikan sensitivitas deteksi. Nilai lebih tinggi mengurangi deteksi palsu.", icon="ℹ")
+        detection_settings_panel()
         
+        # Don't start the camera on a cold model: the first frames would freeze while it loads
+        # (bounded wait: a failed or stuck warm-up shows its state instead of an endless spinner)
+        warmup = get_model_warmup().start()
+        if not warmup.ready:
+            with st.spinner("⏳ Model deteksi sedang dimuat dan dipanaskan..."):
+                warmup.wait(DETECTION_WARMUP_TIMEOUT_S)
+        if warmup.state == "failed":
+            st.error(f"Error loading YOLO model: {warmup.error}. Ensure 'best.pt' is in the root directory.")
+            st.button("🔄 Coba Lagi", key="retry_warmup")
+            st.stop()
+        if not warmup.ready:
+            st.warning(f"⏳ Model deteksi belum siap setelah {DETECTION_WARMUP_TIMEOUT_S:.0f} s (status: {warmup.state}). Coba lagi sebentar lagi.", icon="⏳")
+            st.button("🔄 Coba Lagi", key="retry_warmup")
+            st.stop()
+        st.caption(f"🟢 Model siap (dimuat dan dipanaskan dalam {warmup.status()['load_s']:.1f} s)")
+
         col_cam, col_text = st.columns([2, 1])
         with col_cam:
             st.markdown("<h3>Live Kamera Deteksi</h3>", unsafe_allow_html=True)
+            channel, config = st.session_state.detection_channel, st.session_state.detector_config
             ctx = webrtc_streamer(
                 key="sign-lang",
-                video_transformer_factory=SignLanguageDetector,
+                video_transformer_factory=lambda: SignLanguageDetector(channel, config),
                 media_stream_constraints={
                     "video": {
                         "width": {"min": 640, "ideal": 1280, "max": 1920},
@@ -458,10 +599,7 @@ def detection_page():
                 async_transform=True # Enable async processing for smoother video
             )
             
-            if ctx.state.playing:
-                st.success("✅ Kamera aktif, deteksi sedang berjalan!", icon="🎉")
-            else:
-                st.warning("⚠ Kamera belum diaktifkan. Klik 'START' untuk memulai deteksi.", icon="⚠")
+            live_stats_panel(ctx)
 
         with col_text:
             st.markdown("""
@@ -483,63 +621,81 @@ def detection_page():
             </div>
             """, unsafe_allow_html=True)
             
-            if st.session_state.detected_sign_text:
-                if st.button("Terjemahkan ke Suara (Preview)", key="translate_to_speech", use_container_width=True):
-                    text_to_speak = st.session_state.detected_sign_text
-                    if text_to_speak:
-                        with st.spinner("Mengonversi teks ke suara..."):
-                            try:
-                                result = speech_config.speech_synthesizer.speak_text_async(text_to_speak).get()
-                                if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                                    st.success("Audio terjemahan siap.")
-                                    # For playing audio in Streamlit, usually you'd save it and play it.
-                                    # For a simple demo, Azure's SDK plays it directly if speaker is enabled.
-                                else:
-                                    st.error(f"Gagal mengonversi teks ke suara: {result.reason}")
-                            except Exception as e:
-                                st.error(f"Error dalam konversi teks ke suara: {e}")
-                    else:
-                        st.warning("Tidak ada teks untuk diterjemahkan ke suara.")
+            live_text_panel(st.session_state.detection_channel, st.session_state.detector_config)
 
-def dictionary_page():
-    st.markdown("""
-    <div style="text-align: center; margin-bottom: 2rem;">
-        <h1 style="color: var(--primary-dark);">📚 <span class="gradient-text">Kamus Bahasa Isyarat SIBI</span></h1>
-        <p style="color: var(--text-light); font-size: 1.1rem;">Telusuri dan pelajari Bahasa Isyarat SIBI dengan panduan visual interaktif.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    search_term = st.text_input("🔍 Cari huruf atau kata", placeholder="Contoh: A, B, Halo, Terima Kasih", key="dict_search_input").strip()
+        video_transcription_panel()
+
+@st.fragment
+def video_transcription_panel():
+    with st.expander("🎞 Transkripsi Video Rekaman", expanded=False):
+        st.markdown("Unggah rekaman isyarat untuk mendapatkan teks huruf beserta file subtitle (SRT).")
+        uploaded_video = st.file_uploader("Pilih file video", type=["mp4", "mov", "webm", "mkv", "avi"], key="transcript_video")
+        mirror = st.checkbox("Cerminkan video (seperti kamera depan)", value=True, key="transcript_mirror")
+        if uploaded_video and st.button("Transkripsikan Video", key="transcribe_video", use_container_width=True):
+            progress = st.progress(0.0, text="Memproses video...")
+            duration = video_duration(uploaded_video)
+            uploaded_video.seek(0)
+
+            def on_progress(video_time, frames, text):
+                fraction = min(video_time / duration, 1.0) if duration else 0.0
+                progress.progress(fraction, text=f"{video_time:.1f} s diproses · {frames} frame · {text or '-'}")
+
+            try:
+                result = transcribe_video(
+                    uploaded_video,
+                    get_inference_backend(),
+                    LABELS.by_index,
+                    imgsz=DETECTION_IMGSZ,
+                    conf=st.session_state.detection_threshold,
+                    sample_fps=TRANSCRIPT_SAMPLE_FPS,
+                    batch_size=TRANSCRIPT_BATCH_SIZE,
+                    mirror=mirror,
+                    decoder_options={"window": DECODER_WINDOW, "min_dwell": DECODER_MIN_DWELL_MS / 1000, "vote_ratio": DECODER_VOTE_RATIO, "min_conf": DECODER_MIN_CONF},
+                    duration=duration,
+                    on_progress=on_progress
+                )
+            except Exception as e:
+                progress.empty()
+                st.error(f"Gagal memproses video: {e}")
+                return
+            progress.progress(1.0, text="Selesai")
+            st.session_state.video_transcript = (uploaded_video.name, result)
+
+        if st.session_state.get("video_transcript"):
+            name, result = st.session_state.video_transcript
+            speed = result.duration / result.elapsed if result.elapsed else 0.0
+            st.markdown(f"**Teks:** {html.escape(result.text) or '(tidak ada huruf terdeteksi)'}")
+            st.caption(f"{result.frames} frame dari {result.duration:.1f} s video diproses dalam {result.elapsed:.1f} s ({speed:.1f}x waktu nyata)")
+            st.download_button("⬇ Unduh Subtitle (SRT)", to_srt(result.cues), file_name=f"{os.path.splitext(name)[0]}.srt", mime="application/x-subrip", use_container_width=True)
+
+# Typing in the search box reruns only the results below it
+@st.fragment
+def dictionary_results():
+    # st_keyup reports the text while typing (debounced), where st.text_input only submits on Enter or blur
+    search_term = (st_keyup("🔍 Cari huruf atau kata", placeholder="Contoh: A, B, Halo, Terima Kasih", key="dict_search_input", debounce=DICTIONARY_SEARCH_DEBOUNCE_MS) or "").strip()
     
-    class_map = get_class_mapping()
-    image_map = load_label_images()
+    thumbnails = load_label_thumbnails()
 
-    filtered_items = []
     if search_term:
-        # Prioritize exact letter match for single character search
-        if len(search_term) == 1 and search_term.isalpha():
-            for class_id, letter in class_map.items():
-                if search_term.upper() == letter:
-                    filtered_items.append((class_id, letter))
-        else:
-            # For multi-character search (implies searching for a word, which needs a different dataset)
-            # For now, we only support alphabet lookup.
-            st.info("Fitur pencarian kata (selain alfabet tunggal) belum tersedia. Silakan cari per huruf (A-Y).", icon="ℹ")
-            # Fallback to general alphabet search if no exact single letter match for multi-char input
-            for class_id, letter in class_map.items():
-                if search_term.upper() in letter: # This will still only match individual letters
-                    filtered_items.append((class_id, letter))
+        # Ranked as-you-type lookup: exact, prefix (also per word), then typo-tolerant matches
+        filtered_items = [entry for _, entry in search_index().search(search_term)]
+        if not filtered_items:
+            # No sign for this word (yet): show how to fingerspell it
+            spelled = [{"term": LABELS.letter(class_id), "kind": "huruf", "class_id": class_id} for class_id in (LABELS.index(c) for c in search_term.upper()) if class_id is not None]
+            if spelled:
+                st.info(f"Belum ada isyarat kata untuk \"{search_term}\". Berikut ejaan huruf per huruf:", icon="ℹ")
+            filtered_items = spelled
+        st.markdown("### Hasil Pencarian")
     else:
-        filtered_items = list(class_map.items())
-
-    st.markdown("### Alfabet Bahasa Isyarat SIBI")
-    st.markdown("<p style='color: var(--text-light);'>Berikut adalah daftar lengkap huruf dalam Sistem Isyarat Bahasa Indonesia (SIBI) disertai visual:</p>", unsafe_allow_html=True)
+        filtered_items = [entry for entry in search_index().entries if entry["kind"] == "huruf"]
+        st.markdown("### Alfabet Bahasa Isyarat SIBI")
+        st.markdown("<p style='color: var(--text-light);'>Berikut adalah daftar lengkap huruf dalam Sistem Isyarat Bahasa Indonesia (SIBI) disertai visual:</p>", unsafe_allow_html=True)
     
     if not filtered_items:
         st.warning("Tidak ada hasil ditemukan untuk pencarian Anda.", icon="⚠")
     else:
         cols_per_row = 6
-        items = sorted(filtered_items, key=lambda x: x[1])
+        items = filtered_items
         num_items = len(items)
         num_rows = (num_items + cols_per_row - 1) // cols_per_row
 
@@ -549,207 +705,242 @@ def dictionary_page():
             for i in range(cols_per_row):
                 idx = r * cols_per_row + i
                 if idx < num_items:
-                    class_id, letter = items[idx]
-                    img_path = image_map.get(str(class_id))
+                    entry = items[idx]
                     with cols[i]:
                         st.markdown(f"""
                         <div class="dictionary-card">
-                            <h3 style="margin-top: 0; color: var(--primary-dark);">{letter}</h3>
+                            <h3 style="margin-top: 0; color: var(--primary-dark);">{html.escape(entry["term"])}</h3>
                             """, unsafe_allow_html=True)
-                        if img_path and os.path.exists(img_path):
-                            st.image(img_path, use_container_width=True)
+                        thumbnail_path = thumbnails.get(str(entry["class_id"])) if entry["kind"] == "huruf" else None
+                        media = entry.get("media")
+                        if thumbnail_path:
+                            st.image(thumbnail_bytes(thumbnail_path), use_container_width=True)
+                        elif media and os.path.exists(media):
+                            if media.lower().endswith((".mp4", ".webm", ".mov")):
+                                st.video(media)
+                            else:
+                                st.image(media, use_container_width=True)
                         else:
                             st.markdown("<p style='color: var(--text-light); font-size: 0.9rem;'>(Gambar tidak tersedia)</p>", unsafe_allow_html=True)
+                        if entry.get("description"):
+                            st.caption(entry["description"])
                         st.markdown("</div>", unsafe_allow_html=True)
         st.markdown("</div>", unsafe_allow_html=True)
 
-    st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
-    if st.button("← Kembali", key="back_from_dictionary_bottom", use_container_width=True, type="secondary"):
-        st.session_state.current_page = "🌟 Fitur Unggulan"
-        st.rerun()
+def dictionary_page():
+    st.markdown("""
+    <div style="text-align: center; margin-bottom: 2rem;">
+        <h1 style="color: var(--primary-dark);">📚 <span class="gradient-text">Kamus Bahasa Isyarat SIBI</span></h1>
+        <p style="color: var(--text-light); font-size: 1.1rem;">Telusuri dan pelajari Bahasa Isyarat SIBI dengan panduan visual interaktif.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    dictionary_results()
 
-def speech_page():
-    if st.button("← Kembali", key="back_from_speech", type="secondary"):
-        st.session_state.current_page = "🌟 Fitur Unggulan"
-        st.rerun()
+    st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
+    st.button("← Kembali", key="back_from_dictionary_bottom", use_container_width=True, type="secondary", on_click=go_to, args=("🌟 Fitur Unggulan",))
+
+# Recognizer sessions for the Speech to Visual page (SPEECH_FAKE_RECOGNIZER=1 swaps in a local
+# fake that replays a canned transcript, for trying the page without Azure credentials)
+def recognizer_factory():
+    if os.getenv("SPEECH_FAKE_RECOGNIZER") == "1":
+        return fake_recognizer_factory([("recognizing", "halo"), ("recognized", "halo"), ("recognizing", "terima"), ("recognized", "terima kasih")])
+    return azure_recognizer_factory(get_speech_config())
+
+# Continuous recognition over in-memory audio, showing partial text while it runs
+def transcribe_audio(pcm):
+    if not pcm:
+        # The silence trimmer found nothing louder than background noise
+        st.error("Gagal mengenali suara. Tidak ada ucapan yang terdeteksi.")
+        return None
+    if 'recognizer_pool' not in st.session_state:
+        st.session_state.recognizer_pool = RecognizerPool(recognizer_factory())
+
+    live_text = st.empty()
+    try:
+        text = ""
+        for kind, text in StreamingTranscriber(st.session_state.recognizer_pool).stream(pcm):
+            if kind == "partial":
+                live_text.markdown(f"🗣 _{html.escape(text)}…_")
+        live_text.empty()
+    except Exception as e:
+        live_text.empty()
+        st.error(f"Gagal mengenali suara: {e}")
+        return None
+
+    if not text:
+        st.error("Gagal mengenali suara. Tidak ada ucapan yang terdeteksi.")
+        return None
+    detected_text = text.upper()
+    st.session_state.detected_text = detected_text
+    st.success(f"🗣 Teks Terdeteksi: {detected_text}")
+    return detected_text
+
+# Recording, uploads and the text input rerun only this block, not the page header
+@st.fragment
+def speech_panel():
+    tab1, tab2 = st.tabs(["🎙 Rekam Suara", "📂 Upload Audio"])
     
-    with st.container():
-        st.markdown("""
-        <div style="text-align: center; margin-bottom: 2rem;">
-            <h1 style="color: var(--primary-color);">🎤 Speech to Visual</h1>
-            <p style="color: var(--text-color);">Konversi ucapan Anda menjadi visual bahasa isyarat SIBI.</p>
-        </div>
-        """, unsafe_allow_html=True)
+    with tab1:
+        st.markdown("### 🔴 Rekam Suara Anda")
+        audio = audiorecorder("🎙 Mulai Rekam", "⏹ Berhenti Rekam", key="recorder")
         
-        tab1, tab2 = st.tabs(["🎙 Rekam Suara", "📂 Upload Audio"])
+        if audio is not None and len(audio) > 0:
+            preview = BytesIO()
+            audio.export(preview, format="wav")
+            st.audio(preview.getvalue(), format="audio/wav")
+            if st.button("🔊 Proses Rekaman", key="process_recording", use_container_width=True):
+                with st.spinner("🔄 Memproses rekaman..."):                        
+                    if isinstance(audio, AudioSegment):
+                        samples, rate = audio_pipeline.from_segment(audio)
+                    else:
+                        samples, rate = audio_pipeline.decode(bytes(audio))
+
+                    transcribe_audio(audio_pipeline.normalize(samples, rate))
         
-        detected_text = None
-        audio_path = None
+    with tab2:
+        st.markdown("### 📂 Upload File Audio")
+        uploaded_file = st.file_uploader("Pilih file audio (.wav/.mp3)", type=["wav", "mp3"], label_visibility="collapsed")
         
-        with tab1:
-            st.markdown("### 🔴 Rekam Suara Anda")
-            audio = audiorecorder("🎙 Mulai Rekam", "⏹ Berhenti Rekam", key="recorder")
-            
-            detected_text = None
-            audio_path = None
-            
-            if audio is not None and len(audio) > 0:
-                st.audio(audio.export().read(), format="audio/wav")
-                if st.button("🔊 Proses Rekaman", key="process_recording", use_container_width=True):
-                    with st.spinner("🔄 Memproses rekaman..."):                        
-                        if isinstance(audio, AudioSegment):
-                            audio_segment = audio
-                        else:
-                            audio_segment = AudioSegment.from_file(BytesIO(audio), format="webm")
-
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-                            audio_segment.export(f.name, format="wav")
-                            audio_path = f.name
-                        detected_text = None  # reset detected_text untuk input baru
-                        
-                        if audio_path:
-                            audio_input = speechsdk.AudioConfig(filename=audio_path)
-                            recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
-                            result = recognizer.recognize_once()
-                        
-                            if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                                detected_text = result.text.upper()
-                                st.session_state.detected_text = detected_text
-                                st.success(f"🗣 Teks Terdeteksi: {detected_text}")
-                            else:
-                                st.error(f"Gagal mengenali suara. Reason: {result.reason}")
+        if uploaded_file is not None:
+            st.audio(uploaded_file, format=f"audio/{uploaded_file.name.split('.')[-1]}")
             
-        with tab2:
-            st.markdown("### 📂 Upload File Audio")
-            uploaded_file = st.file_uploader("Pilih file audio (.wav/.mp3)", type=["wav", "mp3"], label_visibility="collapsed")
-            
-            if uploaded_file is not None:
-                st.audio(uploaded_file, format=f"audio/{uploaded_file.name.split('.')[-1]}")
-                
-                if st.button("🔊 Proses File Audio", key="process_upload", use_container_width=True):
-                    with st.spinner("🔄 Memproses file audio..."):
-                        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
-                            f.write(uploaded_file.read())
-                            audio_path = f.name
-                        
-                        audio_input = speechsdk.AudioConfig(filename=audio_path)
-                        recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_input)
-                        result = recognizer.recognize_once()
-                        
-                        if result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                            detected_text = result.text.upper()
-                            st.session_state.detected_text = detected_text
-                            st.success(f"🗣 Teks Terdeteksi: {detected_text}")
-                        else:
-                            st.error(f"Gagal mengenali suara. Reason: {result.reason}")
+            if st.button("🔊 Proses File Audio", key="process_upload", use_container_width=True):
+                with st.spinner("🔄 Memproses file audio..."):
+                    # Decoded in memory (WAV directly, MP3 through PyAV), resampled and silence-trimmed with NumPy
+                    try:
+                        samples, rate = audio_pipeline.decode(uploaded_file.getvalue())
+                    except Exception as e:
+                        st.error(f"File audio tidak dapat dibaca: {e}")
+                    else:
+                        transcribe_audio(audio_pipeline.normalize(samples, rate))
 
-        # Display sign language visuals based on detected/entered text
-        st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
-        st.markdown("### 🖼 Visual Bahasa Isyarat dari Teks")
+    # Display sign language visuals based on detected/entered text
+    st.markdown("<hr class='styled-divider'>", unsafe_allow_html=True)
+    st.markdown("### 🖼 Visual Bahasa Isyarat dari Teks")
 
-        # Create two columns for input and button
-        col1, col2 = st.columns([4, 1])
-        with col1:
-            input_text_for_visuals = st.text_input(
-                "Atau masukkan teks manual untuk melihat visual SIBI:",
-                value=st.session_state.detected_text if 'detected_text' in st.session_state else "",
-                key="text_input_for_visuals",
-                placeholder="Contoh: HALO, TERIMA KASIH"
-            )
-        with col2:
-            st.write("")  # For vertical alignment
-            process_text = st.button("🔍 Tampilkan Visual", use_container_width=True)
+    # Create two columns for input and button
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        input_text_for_visuals = st.text_input(
+            "Atau masukkan teks manual untuk melihat visual SIBI:",
+            value=st.session_state.detected_text if 'detected_text' in st.session_state else "",
+            key="text_input_for_visuals",
+            placeholder="Contoh: HALO, TERIMA KASIH"
+        )
+    with col2:
+        st.write("")  # For vertical alignment
+        process_text = st.button("🔍 Tampilkan Visual", use_container_width=True)
 
-        # Display processing message
-        if process_text and input_text_for_visuals:
-            with st.spinner("🔄 Memproses teks dan menyiapkan visual SIBI..."):
-                time.sleep(0.5)  # Simulate processing time
-                
-                # Process the text and display visuals
-                class_map = get_class_mapping()
-                inv_class_map = {v: str(k) for k, v in class_map.items()}
-                image_map = load_label_images()
-                
-                # Clean and prepare the text
-                processed_text = input_text_for_visuals.strip().upper()
-                st.session_state.detected_text = processed_text  # Store for persistence
-                
-                st.markdown("### 👐 Visualisasi Bahasa Isyarat")
-                
-                # Display the original text
-                st.markdown(f"""
-                <div style="background: var(--card-bg); padding: 1rem; border-radius: var(--border-radius); 
-                            margin-bottom: 1rem; box-shadow: var(--box-shadow);">
-                    <p style="margin: 0; font-weight: 500;">Teks yang diproses:</p>
-                    <p style="margin: 0; font-size: 1.2rem;">{processed_text}</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Filter valid SIBI characters
-                valid_chars = [c for c in processed_text if c in inv_class_map]
-                invalid_chars = [c for c in processed_text if c not in inv_class_map and c != ' ']
-                
-                # Show stats about the text
-                stats_col1, stats_col2 = st.columns(2)
-                with stats_col1:
-                    st.metric("Total Karakter", len(processed_text))
-                with stats_col2:
-                    st.metric("Huruf SIBI Valid", len(valid_chars))
+    # Display processing message
+    if process_text and input_text_for_visuals:
+        with st.spinner("🔄 Memproses teks dan menyiapkan visual SIBI..."):
+            time.sleep(0.5)  # Simulate processing time
+            
+            # Process the text and display visuals
+            thumbnails = load_label_thumbnails()
+            
+            # Clean and prepare the text
+            processed_text = input_text_for_visuals.strip().upper()
+            st.session_state.detected_text = processed_text  # Store for persistence
+            
+            st.markdown("### 👐 Visualisasi Bahasa Isyarat")
+            
+            # Display the original text
+            st.markdown(f"""
+            <div style="background: var(--card-bg); padding: 1rem; border-radius: var(--border-radius); 
+                        margin-bottom: 1rem; box-shadow: var(--box-shadow);">
+                <p style="margin: 0; font-weight: 500;">Teks yang diproses:</p>
+                <p style="margin: 0; font-size: 1.2rem;">{processed_text}</p>
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Filter valid SIBI characters
+            valid_chars = [c for c in processed_text if c in LABELS.by_letter]
+            invalid_chars = [c for c in processed_text if c not in LABELS.by_letter and c != ' ']
+            
+            # Show stats about the text
+            stats_col1, stats_col2 = st.columns(2)
+            with stats_col1:
+                st.metric("Total Karakter", len(processed_text))
+            with stats_col2:
+                st.metric("Huruf SIBI Valid", len(valid_chars))
+            
+            if invalid_chars:
+                st.warning(f"Karakter berikut tidak memiliki visual SIBI: {', '.join(set(invalid_chars))}")
+            
+            # Display SIBI signs in a responsive grid
+            if valid_chars:
+                st.markdown("#### Huruf SIBI yang Dikenali")
                 
-                if invalid_chars:
-                    st.warning(f"Karakter berikut tidak memiliki visual SIBI: {', '.join(set(invalid_chars))}")
+                # Display 6 signs per row
+                cols_per_row = 6
+                num_rows = (len(valid_chars) + cols_per_row - 1) // cols_per_row
                 
-                # Display SIBI signs in a responsive grid
-                if valid_chars:
-                    st.markdown("#### Huruf SIBI yang Dikenali")
+                for row in range(num_rows):
+                    cols = st.columns(cols_per_row)
+                    start_idx = row * cols_per_row
+                    end_idx = start_idx + cols_per_row
+                    row_chars = valid_chars[start_idx:end_idx]
                     
-                    # Display 6 signs per row
-                    cols_per_row = 6
-                    num_rows = (len(valid_chars) + cols_per_row - 1) // cols_per_row
-                    
-                    for row in range(num_rows):
-                        cols = st.columns(cols_per_row)
-                        start_idx = row * cols_per_row
-                        end_idx = start_idx + cols_per_row
-                        row_chars = valid_chars[start_idx:end_idx]
-                        
-                        for i, char in enumerate(row_chars):
-                            with cols[i]:
-                                class_id = inv_class_map[char]
-                                img_path = image_map.get(class_id)
-                                
+                    for i, char in enumerate(row_chars):
+                        with cols[i]:
+                            class_id = LABELS.index(char)
+                            thumbnail_path = thumbnails.get(str(class_id))
+                            
+                            st.markdown(f"""
+                            <div style="text-align: center; padding: 0.5rem; margin-bottom: 1rem; 
+                                        background: var(--card-bg); border-radius: var(--border-radius); 
+                                        box-shadow: var(--box-shadow); transition: var(--transition);">
+                                <h4 style="margin: 0.5rem 0; color: var(--primary-dark);">{char}</h4>
+                            """, unsafe_allow_html=True)
+                            
+                            if thumbnail_path:
+                                st.image(thumbnail_bytes(thumbnail_path), use_container_width=True)
+                            else:
                                 st.markdown(f"""
-                                <div style="text-align: center; padding: 0.5rem; margin-bottom: 1rem; 
-                                            background: var(--card-bg); border-radius: var(--border-radius); 
-                                            box-shadow: var(--box-shadow); transition: var(--transition);">
-                                    <h4 style="margin: 0.5rem 0; color: var(--primary-dark);">{char}</h4>
+                                <div style="height: 100px; display: flex; align-items: center; 
+                                            justify-content: center; background: #F3F4F6; 
+                                            border-radius: 8px; margin-bottom: 0.5rem;">
+                                    <p style="color: var(--text-light);">Gambar tidak tersedia</p>
+                                </div>
                                 """, unsafe_allow_html=True)
-                                
-                                if img_path and os.path.exists(img_path):
-                                    st.image(img_path, use_container_width=True)
-                                else:
-                                    st.markdown(f"""
-                                    <div style="height: 100px; display: flex; align-items: center; 
-                                                justify-content: center; background: #F3F4F6; 
-                                                border-radius: 8px; margin-bottom: 0.5rem;">
-                                        <p style="color: var(--text-light);">Gambar tidak tersedia</p>
-                                    </div>
-                                    """, unsafe_allow_html=True)
-                                
-                                st.markdown("</div>", unsafe_allow_html=True)
-                else:
-                    st.error("Tidak ada huruf SIBI yang valid dalam teks yang dimasukkan.")
-                    
-                # Add space before the next section
-                st.markdown("<br><br>", unsafe_allow_html=True)
-        elif process_text and not input_text_for_visuals:
-            st.warning("Silakan masukkan teks terlebih dahulu")
+                            
+                            st.markdown("</div>", unsafe_allow_html=True)
+            else:
+                st.error("Tidak ada huruf SIBI yang valid dalam teks yang dimasukkan.")
+                
+            # Add space before the next section
+            st.markdown("<br><br>", unsafe_allow_html=True)
+    elif process_text and not input_text_for_visuals:
+        st.warning("Silakan masukkan teks terlebih dahulu")
+
+def speech_page():
+    st.button("← Kembali", key="back_from_speech", type="secondary", on_click=go_to, args=("🌟 Fitur Unggulan",))
     
+    with st.container():
+        st.markdown("""
+        <div style="text-align: center; margin-bottom: 2rem;">
+            <h1 style="color: var(--primary-color);">🎤 Speech to Visual</h1>
+            <p style="color: var(--text-color);">Konversi ucapan Anda menjadi visual bahasa isyarat SIBI.</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        speech_panel()
+
+def add_chat_message(role, content):
+    message = {"role": role, "content": content}
+    st.session_state.chatbot_messages.append(message)
+    st.session_state.chatbot_html.append(render_message(message))
+    # After a reply, keep the session history bounded: the oldest turns are summarized once and dropped
+    dropped = history_overflow(st.session_state.chatbot_messages, CHATBOT_HISTORY_LIMIT) if role == "assistant" else 0
+    if dropped:
+        st.session_state.chatbot_summary = summarize_turns(get_openai_client(), st.session_state.chatbot_summary, st.session_state.chatbot_messages[:dropped], max_tokens=CHATBOT_SUMMARY_TOKENS)
+        del st.session_state.chatbot_messages[:dropped]
+        del st.session_state.chatbot_html[:dropped]
 
 def chatbot_page():
-    if st.button("← Kembali", key="back_from_chatbot", type="secondary"):
-        st.session_state.current_page = "🌟 Fitur Unggulan"
-        st.rerun()
+    st.button("← Kembali", key="back_from_chatbot", type="secondary", on_click=go_to, args=("🌟 Fitur Unggulan",))
 
     st.markdown("""
     <div style="text-align: center; margin-bottom: 2rem;">
@@ -758,60 +949,66 @@ def chatbot_page():
     </div>
     """, unsafe_allow_html=True)
 
-    # Display chat messages from history
-    for message in st.session_state.chatbot_messages:
-        if message["role"] == "user":
-            st.markdown(f"""
-            <div class="chat-row user-row">
-                <div class="chat-message-container user-message">
-                    <p>{html.escape(message["content"])}</p>
-                </div>
-                <div class="chat-avatar" style="background-color: #555;">😎</div>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown(f"""
-            <div class="chat-row bot-row">
-                <div class="chat-avatar">🤖</div>
-                <div class="chat-message-container bot-message">
-                    <p>{html.escape(message["content"])}</p>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
+    # Display chat messages from history (HTML rendered once per message, shown as one block)
+    st.markdown("".join(st.session_state.chatbot_html), unsafe_allow_html=True)
 
     # User input
     user_query = st.chat_input("Tanyakan sesuatu tentang SIBI atau InSignia...", key="chatbot_input")
 
     if user_query:        
-        st.session_state.chatbot_messages.append({"role": "user", "content": user_query})        
-        with st.spinner("🤖 InSignia Bot sedang berpikir..."):
+        # Only first questions are cached: a follow-up like "jelaskan lebih lanjut" depends on
+        # this conversation, and its answer would be wrong for anyone else
+        context_free = not st.session_state.chatbot_summary and not any(message["role"] == "user" for message in st.session_state.chatbot_messages)
+        add_chat_message("user", user_query)
+        st.markdown(st.session_state.chatbot_html[-1], unsafe_allow_html=True)
+        reply_bubble = st.empty()
+        response_cache = get_response_cache()
+        cached_response = response_cache.get(user_query) if context_free else None
+        if cached_response is not None:
+            # Same question answered before: no API call
+            add_chat_message("assistant", cached_response)
+            reply_bubble.markdown(st.session_state.chatbot_html[-1], unsafe_allow_html=True)
+        else:
             try:
-                # Prepare messages for OpenAI API
-                messages_for_api = [
-                    {"role": "system", "content": "Anda adalah InSignia Bot, chatbot yang ramah dan informatif. Anda ahli dalam Bahasa Isyarat SIBI, inklusivitas untuk penyandang disabilitas pendengaran, dan fitur-fitur aplikasi InSignia. Berikan jawaban yang membantu, akurat, dan mendorong inklusivitas. Gunakan bahasa Indonesia yang baik dan benar."}
-                ] + st.session_state.chatbot_messages[-5:] # Send last 5 messages for context
+                # Prepare messages for OpenAI API: as much relevant history as fits the token budget
+                messages_for_api = build_context(
+                    "Anda adalah InSignia Bot, chatbot yang ramah dan informatif. Anda ahli dalam Bahasa Isyarat SIBI, inklusivitas untuk penyandang disabilitas pendengaran, dan fitur-fitur aplikasi InSignia. Berikan jawaban yang membantu, akurat, dan mendorong inklusivitas. Gunakan bahasa Indonesia yang baik dan benar.",
+                    st.session_state.chatbot_messages,
+                    CHATBOT_CONTEXT_TOKENS,
+                    st.session_state.chatbot_summary
+                )
 
-                response = openai_client.chat.completions.create(
+                # Tokens are drawn into the bubble as they arrive; no rerun needed afterwards
+                started = time.perf_counter()
+                bot_response = render_stream(stream_reply(
+                    get_openai_client(),
+                    messages_for_api,
                     model="gpt-4", # Replace with your actual deployed model name (e.g., gpt-35-turbo, gpt-4)
-                    messages=messages_for_api,
                     temperature=0.7,
                     max_tokens=500
-                )
-                bot_response = response.choices[0].message.content
-                st.session_state.chatbot_messages.append({"role": "assistant", "content": bot_response})
+                ), reply_bubble)
+                add_chat_message("assistant", bot_response)
+                if bot_response and context_free:
+                    response_cache.put(user_query, bot_response, time.perf_counter() - started)
             except Exception as e:
+                reply_bubble.empty()
                 st.error(f"Maaf, terjadi kesalahan saat berkomunikasi dengan chatbot: {e}")
-                st.session_state.chatbot_messages.append({"role": "assistant", "content": "Maaf, saya tidak bisa memproses permintaan Anda saat ini. Silakan coba lagi nanti."})
-        st.rerun()
+                add_chat_message("assistant", "Maaf, saya tidak bisa memproses permintaan Anda saat ini. Silakan coba lagi nanti.")
+                st.markdown(st.session_state.chatbot_html[-1], unsafe_allow_html=True)
+
+    cache_stats = get_response_cache().stats()
+    if cache_stats["hits"] + cache_stats["misses"]:
+        st.caption(f"Cache jawaban: {cache_stats['hit_rate']:.0%} hit rate · {cache_stats['saved_seconds']:.1f} s latensi dihemat · {cache_stats['entries']} entri")
     
-def settings_page():
-    st.markdown("""
-    <div style="text-align: center; margin-bottom: 2rem;">
-        <h1 style="color: var(--primary-color);">⚙ Pengaturan Aplikasi</h1>
-        <p style="color: var(--text-color);">Sesuaikan preferensi InSignia Anda.</p>
-    </div>
-    """, unsafe_allow_html=True)
+def reset_settings():
+    st.session_state.show_fps_camera = True
+    st.session_state.detection_threshold = 0.6
+    # Drop the widgets' own state so they are rebuilt from the defaults above
+    for key in ("settings_show_fps", "settings_detection_threshold"):
+        st.session_state.pop(key, None)
 
+@st.fragment
+def settings_panel():
     st.markdown("### Pengaturan Deteksi Kamera")
     st.session_state.show_fps_camera = st.checkbox("Tampilkan FPS di halaman Deteksi", value=st.session_state.show_fps_camera, key="settings_show_fps")
     st.session_state.detection_threshold = st.slider("Threshold Deteksi (Confidence Model)", 0.0, 1.0, st.session_state.detection_threshold, 0.05, key="settings_detection_threshold")
@@ -822,25 +1019,27 @@ def settings_page():
     # st.selectbox("Bahasa Aplikasi", ["Bahasa Indonesia", "English"], key="app_language")
     
     # Reset button for all settings if needed
-    if st.button("Reset Pengaturan ke Default", key="reset_settings", type="secondary"):
-        st.session_state.show_fps_camera = True
-        st.session_state.detection_threshold = 0.6
+    if st.button("Reset Pengaturan ke Default", key="reset_settings", type="secondary", on_click=reset_settings):
         st.success("Pengaturan telah direset ke nilai default.")
-        st.rerun()
 
+def settings_page():
+    st.markdown("""
+    <div style="text-align: center; margin-bottom: 2rem;">
+        <h1 style="color: var(--primary-color);">⚙ Pengaturan Aplikasi</h1>
+        <p style="color: var(--text-color);">Sesuaikan preferensi InSignia Anda.</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    settings_panel()
 
 # --- Main Application Logic ---
-if st.session_state.current_page == "🏠 Beranda":
-    landing_page()
-elif st.session_state.current_page == "🌟 Fitur Unggulan":
-    features_page()
-elif st.session_state.current_page == "📷 Deteksi":
-    detection_page()
-elif st.session_state.current_page == "📚 Kamus":
-    dictionary_page()
-elif st.session_state.current_page == "🎤 Speech to Visual":
-    speech_page()
-elif st.session_state.current_page == "💬 Chatbot":
-    chatbot_page()
-elif st.session_state.current_page == "⚙ Pengaturan":
-    settings_page()
\ No newline at end of file
+PAGES = {
+    "🏠 Beranda": landing_page,
+    "🌟 Fitur Unggulan": features_page,
+    "📷 Deteksi": detection_page,
+    "📚 Kamus": dictionary_page,
+    "🎤 Speech to Visual": speech_page,
+    "💬 Chatbot": chatbot_page,
+    "⚙ Pengaturan": settings_page,
+}
+PAGES.get(st.session_state.current_page, landing_page)()
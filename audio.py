@@ -0,0 +1,117 @@
+# In-memory audio preprocessing for speech recognition: decode once, then 16 kHz mono
+# PCM16 with silence trimmed. Everything is NumPy on arrays; no ffmpeg process or temp files.
+import wave
+from io import BytesIO
+
+import numpy as np
+
+TARGET_RATE = 16000
+
+
+def _to_float(samples):
+    # Integer PCM -> float32 in [-1, 1)
+    if samples.dtype == np.uint8:
+        return (samples.astype(np.float32) - 128) / 128
+    if np.issubdtype(samples.dtype, np.integer):
+        return samples.astype(np.float32) / (np.iinfo(samples.dtype).max + 1)
+    return samples.astype(np.float32)
+
+
+def _decode_wav(data):
+    with wave.open(BytesIO(data)) as wav:
+        width = wav.getsampwidth()
+        dtype = {1: np.uint8, 2: np.int16, 4: np.int32}.get(width)
+        if dtype is None:
+            return None  # e.g. 24-bit: let PyAV handle it
+        channels = wav.getnchannels()
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=dtype).reshape(-1, channels)
+        return _to_float(samples), wav.getframerate()
+
+
+def _decode_av(data):
+    # PyAV decodes MP3/WebM/Ogg in-process with libav
+    import av
+
+    chunks = []
+    with av.open(BytesIO(data)) as container:
+        stream = container.streams.audio[0]
+        rate = stream.rate
+        for frame in container.decode(stream):
+            array = frame.to_ndarray()
+            channels = len(frame.layout.channels)
+            # Planar formats come as (channels, n); packed ones as (1, n * channels)
+            chunks.append(array.T if frame.format.is_planar else array.reshape(-1, channels))
+            rate = frame.sample_rate or rate
+    if not chunks:
+        return np.zeros((0, 1), dtype=np.float32), rate
+    return _to_float(np.concatenate(chunks)), rate
+
+
+def decode(data):
+    # Returns (float32 samples shaped (n, channels), sample rate)
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        try:
+            decoded = _decode_wav(data)
+        except wave.Error:
+            decoded = None
+        if decoded is not None:
+            return decoded
+    return _decode_av(data)
+
+
+def from_segment(segment):
+    # pydub AudioSegment (what streamlit_audiorecorder returns) -> same form as decode(), no export round trip
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[segment.sample_width]
+    samples = np.frombuffer(segment.raw_data, dtype=dtype).reshape(-1, segment.channels)
+    return _to_float(samples), segment.frame_rate
+
+
+def resample(samples, rate, target=TARGET_RATE):
+    # Mono float32 in, mono float32 out. Downsampling first low-passes with a windowed sinc
+    # at the new Nyquist frequency so higher frequencies don't alias into the speech band.
+    if rate == target or not len(samples):
+        return samples.astype(np.float32)
+    if target < rate:
+        cutoff = target / rate / 2
+        taps = np.arange(-32, 33)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+    duration = len(samples) / rate
+    positions = np.arange(int(duration * target)) * (rate / target)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples, rate=TARGET_RATE, frame_ms=30, threshold_db=-35, floor_db=-55, pad_ms=240):
+    # Energy VAD: a frame is speech when its RMS is within threshold_db of the loudest frame
+    # (and above an absolute floor). Speech is kept with pad_ms either side, which trims the
+    # ends and shortens long pauses to at most 2 * pad_ms.
+    frame = int(rate * frame_ms / 1000)
+    count = len(samples) // frame
+    if count == 0:
+        return samples
+    frames = samples[:count * frame].reshape(count, frame)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-12)
+    speech = energy_db > max(energy_db.max() + threshold_db, floor_db)
+    if not speech.any():
+        return samples[:0]
+
+    pad = max(1, int(pad_ms / frame_ms))
+    keep = np.convolve(speech, np.ones(2 * pad + 1), mode="same") > 0
+    kept = frames[keep].reshape(-1)
+    # The tail that didn't fill a whole frame belongs to the last frame's decision
+    if keep[-1]:
+        kept = np.concatenate([kept, samples[count * frame:]])
+    return kept
+
+
+def to_pcm16(samples):
+    return (np.clip(samples, -1.0, 1.0 - 1 / 32768) * 32768).astype("<i2").tobytes()
+
+
+def normalize(samples, rate, trim=True):
+    # (n, channels) float32 at any rate -> 16 kHz mono PCM16 bytes ready for the recognizer
+    mono = samples.mean(axis=1) if samples.ndim == 2 else samples
+    mono = resample(mono, rate)
+    if trim:
+        mono = trim_silence(mono)
+    return to_pcm16(mono)
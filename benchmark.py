@@ -0,0 +1,440 @@
+# Headless benchmarks for the sign detector (no browser or webcam needed)
+#   python benchmark.py runtimes --images test/images --frames 100
+#   python benchmark.py frames --frames 300
+#   python benchmark.py detector --images test/images --json detector.json
+#   python benchmark.py detector --video recording.mp4 --backend process
+#   python benchmark.py startup --page "🏠 Beranda" --reruns 20 --clicks 20
+#     (to compare with an older app.py: git show <rev>:app.py > app_before.py, then --app app_before.py)
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from detection import DetectorConfig, FrameBuffers, FrameScheduler, LetterDecoder, RoiTracker, SignDetector
+from inference import RUNTIMES, InferenceBroker, ProcessPoolBackend, available_runtimes, checkpoint_hash, export_model, to_detections
+from labels import get_label_table
+from timings import PIPELINE_STAGES, StageTimings
+
+
+def load_frames(image_dir, limit):
+    paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")) + glob.glob(os.path.join(image_dir, "*.png")))[:limit]
+    frames = [cv2.imread(path) for path in paths]
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        # No dataset on this host: fall back to noise at the webcam resolution so timings are still comparable
+        print(f"No images found in '{image_dir}', using {limit} synthetic 1280x720 frames")
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(limit)]
+    return frames
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+def summarize_latencies(latencies):
+    total = sum(latencies)
+    return {
+        "frames": len(latencies),
+        "fps": len(latencies) / total if total else 0.0,
+        "mean_ms": 1000 * total / len(latencies) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+    }
+
+
+# --- Runtime comparison ---
+# Runs every requested runtime over the same frames and reports latency plus how often
+# each runtime's predicted classes agree with the PyTorch checkpoint.
+def bench_runtime(model_path, frames, imgsz, conf, warmup):
+    from ultralytics import YOLO
+
+    load_started = time.perf_counter()
+    model = YOLO(model_path, task="detect")
+    load_seconds = time.perf_counter() - load_started
+
+    for frame in frames[:warmup]:
+        model.predict(frame, imgsz=imgsz, conf=conf, verbose=False)
+
+    latencies = []
+    classes = []
+    for frame in frames:
+        started = time.perf_counter()
+        result = model.predict(frame, imgsz=imgsz, conf=conf, verbose=False)[0]
+        latencies.append(time.perf_counter() - started)
+        classes.append(sorted(to_detections(result).cls.tolist()))
+
+    report = summarize_latencies(latencies)
+    report["load_s"] = load_seconds
+    return report, classes
+
+
+def run_runtimes(args):
+    frames = load_frames(args.images, args.frames)
+    runtimes = args.runtimes or available_runtimes()
+
+    reports = {}
+    baseline = None
+    for runtime in runtimes:
+        try:
+            model_path = export_model(args.weights, runtime, imgsz=args.imgsz, cache_dir=args.cache_dir)
+        except Exception as e:
+            print(f"{runtime:>9}: skipped ({type(e).__name__}: {e})")
+            continue
+
+        report, classes = bench_runtime(model_path, frames, args.imgsz, args.conf, args.warmup)
+        if runtime == "torch":
+            baseline = classes
+        if baseline is not None:
+            report["class_agreement"] = sum(a == b for a, b in zip(classes, baseline)) / len(frames)
+        reports[runtime] = report
+
+        agreement = report.get("class_agreement")
+        print(
+            f"{runtime:>9}: {report['fps']:7.1f} fps  mean {report['mean_ms']:6.1f} ms  "
+            f"p50 {report['p50_ms']:6.1f} ms  p95 {report['p95_ms']:6.1f} ms  load {report['load_s']:5.2f} s"
+            + (f"  agree {agreement:.1%}" if agreement is not None else "")
+        )
+    return reports
+
+
+# --- Frame path allocations ---
+# Compares the original decode -> flip -> re-wrap path with FrameBuffers on synthetic
+# I420 frames (what WebRTC delivers). tracemalloc sees NumPy allocations, so the peak
+# above the pre-frame baseline is the transient memory each frame allocates.
+def measure_frame_path(path, frames):
+    tracemalloc.start()
+    allocated = []
+    started = time.perf_counter()
+    for frame in frames:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        path(frame)
+        allocated.append(tracemalloc.get_traced_memory()[1] - baseline)
+    elapsed = time.perf_counter() - started
+    tracemalloc.stop()
+    return {
+        "bytes_per_frame": float(np.mean(allocated)),
+        "ms_per_frame": 1000 * elapsed / len(frames),
+    }
+
+
+def run_frames(args):
+    import av
+
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    frames = [av.VideoFrame.from_ndarray(source, format="bgr24").reformat(format="yuv420p") for _ in range(args.frames)]
+
+    def legacy_path(frame):
+        img = frame.to_ndarray(format="bgr24")
+        img = cv2.flip(img, 1)
+        return av.VideoFrame.from_ndarray(img, format="bgr24")
+
+    buffers = FrameBuffers()
+
+    def buffered_path(frame):
+        return av.VideoFrame.from_ndarray(buffers.decode_mirrored(frame), format="bgr24")
+
+    buffered_path(frames[0])  # allocate the per-session buffers outside the measurement
+    reports = {"legacy": measure_frame_path(legacy_path, frames), "buffered": measure_frame_path(buffered_path, frames)}
+    reports["buffered"]["session_buffers_bytes"] = buffers.nbytes()
+    for name, report in reports.items():
+        print(f"{name:>9}: {report['bytes_per_frame'] / 1e6:6.2f} MB allocated/frame  {report['ms_per_frame']:6.2f} ms/frame")
+    return reports
+
+
+def run_startup(args):
+    # Cold start = first script run in a fresh interpreter (imports + resources the page builds);
+    # rerun = later runs of the same session, which is what every widget interaction costs
+    from streamlit.testing.v1 import AppTest
+
+    import resources
+
+    app = AppTest.from_file(args.app, default_timeout=args.timeout)
+    if args.page:
+        app.session_state["current_page"] = args.page
+    started = time.perf_counter()
+    app.run()
+    cold_start = time.perf_counter() - started
+
+    reruns = []
+    for _ in range(args.reruns):
+        started = time.perf_counter()
+        app.run()
+        reruns.append(time.perf_counter() - started)
+
+    # Navigation clicks between two sidebar pages; a click that ends in st.rerun() runs the
+    # script again inside the same app.run(), so this is the whole server cost of one click
+    clicks = []
+    for i in range(args.clicks):
+        button = app.button(key=("features", "home")[i % 2])
+        started = time.perf_counter()
+        button.click().run()
+        clicks.append(time.perf_counter() - started)
+
+    report = {
+        "app": args.app,
+        "page": args.page,
+        "cold_start_s": cold_start,
+        "rerun": summarize_latencies(reruns),
+        "click": summarize_latencies(clicks),
+        "resource_build_s": resources.build_times(),
+        "exceptions": [str(exception.value) for exception in app.exception],
+    }
+    print(f"cold start: {cold_start * 1000:8.1f} ms")
+    print(f"rerun:      {report['rerun']['mean_ms']:8.1f} ms mean  {report['rerun']['p95_ms']:8.1f} ms p95  ({args.reruns} runs)")
+    if clicks:
+        print(f"click:      {report['click']['mean_ms']:8.1f} ms mean  {report['click']['p95_ms']:8.1f} ms p95  ({args.clicks} clicks)")
+    for name, seconds in report["resource_build_s"].items():
+        print(f"  built {name}: {seconds * 1000:.1f} ms")
+    return report
+
+
+# --- Detector replay ---
+# Feeds dataset images or a recorded video through SignDetector, the pipeline behind the
+# camera page (I420 decode, optional mirror, ROI tracking, letter decoding, drawing), and
+# scores every inferred image against its YOLO label file.
+def load_ground_truth(label_path, width, height):
+    boxes = []
+    if os.path.exists(label_path):
+        with open(label_path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 5:
+                    cls, cx, cy, w, h = int(parts[0]), *map(float, parts[1:5])
+                    boxes.append((cls, ((cx - w / 2) * width, (cy - h / 2) * height, (cx + w / 2) * width, (cy + h / 2) * height)))
+    return boxes
+
+
+def box_iou(a, b):
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    intersection = width * height
+    return intersection / ((a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection)
+
+
+def score_detections(detections, truth, counts, iou_threshold):
+    # Greedy matching by confidence within each class: a prediction is a true positive if
+    # it overlaps an unmatched ground-truth box of the same class by at least iou_threshold
+    unmatched = list(truth)
+    for i in np.argsort(-detections.conf):
+        cls = int(detections.cls[i])
+        best, best_iou = None, iou_threshold
+        for j, (truth_cls, truth_box) in enumerate(unmatched):
+            if truth_cls == cls:
+                iou = box_iou(detections.xyxy[i], truth_box)
+                if iou >= best_iou:
+                    best, best_iou = j, iou
+        if best is None:
+            counts[cls]["fp"] += 1
+        else:
+            counts[cls]["tp"] += 1
+            unmatched.pop(best)
+    for truth_cls, _ in unmatched:
+        counts[truth_cls]["fn"] += 1
+
+
+def image_frames(image_dir, limit):
+    import av
+
+    paths = sorted(glob.glob(os.path.join(image_dir, "*.jpg")) + glob.glob(os.path.join(image_dir, "*.png")))
+    for path in paths[:limit or None]:
+        img = cv2.imread(path)
+        if img is None:
+            continue
+        # Even dimensions so the frame is I420 like a WebRTC frame
+        img = img[:img.shape[0] // 2 * 2, :img.shape[1] // 2 * 2]
+        yield path, av.VideoFrame.from_ndarray(img, format="bgr24").reformat(format="yuv420p")
+
+
+def video_frames(video_path, limit):
+    import av
+
+    with av.open(video_path) as container:
+        for i, frame in enumerate(container.decode(video=0)):
+            if limit and i >= limit:
+                break
+            yield None, frame
+
+
+def make_backend(args):
+    model_path = export_model(args.weights, args.runtime, imgsz=args.imgsz, cache_dir=args.cache_dir)
+    if args.backend == "process":
+        return ProcessPoolBackend(model_path, args.workers or None), model_path
+    from ultralytics import YOLO
+
+    return InferenceBroker(YOLO(model_path, task="detect"), max_batch=1, window_ms=0), model_path
+
+
+def run_detector(args):
+    import psutil
+
+    labels = get_label_table(args.data)
+    backend, model_path = make_backend(args)
+    # Dataset images are unrelated stills: infer every one. A video keeps the adaptive stride.
+    max_stride = args.max_stride if args.video else 1
+    roi = RoiTracker(args.roi_imgsz) if (args.roi if args.roi is not None else bool(args.video)) else None
+    timings = StageTimings()
+    detector = SignDetector(
+        backend,
+        labels,
+        LetterDecoder(labels.by_index),
+        # No staleness check: frames are read as fast as they are processed, so a replay slower
+        # than real time would otherwise drop frames against the wall clock
+        FrameScheduler(args.target_latency_ms, max_stride, max_frame_age_ms=0),
+        roi,
+        args.imgsz,
+        config=DetectorConfig(args.conf, show_fps=False),
+        timings=timings,
+        mirror=args.mirror,
+        top_k=args.top_k,
+        agnostic_iou=args.agnostic_iou,
+    )
+
+    frames = video_frames(args.video, args.frames) if args.video else image_frames(args.images, args.frames)
+    counts = {i: {"tp": 0, "fp": 0, "fn": 0} for i in range(len(labels))}
+    process = psutil.Process()
+    peak_rss = process.memory_info().rss
+    latencies = []
+    inferred_latencies = []  # frames the scheduler ran the model on
+    skipped_latencies = []   # frames that reused the last boxes (stride)
+    scored = 0
+    for i, (path, frame) in enumerate(frames):
+        detector.last_detections = None
+        started = time.perf_counter()
+        detector.transform(frame)
+        elapsed = time.perf_counter() - started
+        if i >= args.warmup:
+            latencies.append(elapsed)
+            (inferred_latencies if detector.last_detections is not None else skipped_latencies).append(elapsed)
+        peak_rss = max(peak_rss, process.memory_info().rss)
+
+        if path and detector.last_detections is not None:
+            truth = load_ground_truth(os.path.join(os.path.dirname(os.path.dirname(path)), "labels", os.path.splitext(os.path.basename(path))[0] + ".txt"), frame.width, frame.height)
+            if args.mirror:
+                truth = [(cls, (frame.width - x2, y1, frame.width - x1, y2)) for cls, (x1, y1, x2, y2) in truth]
+            score_detections(detector.last_detections, truth, counts, args.iou)
+            scored += 1
+    if hasattr(backend, "close"):
+        backend.close()
+
+    per_class = {}
+    for cls, count in counts.items():
+        if count["tp"] + count["fp"] + count["fn"]:
+            per_class[labels.letter(cls)] = {
+                **count,
+                "precision": count["tp"] / (count["tp"] + count["fp"]) if count["tp"] + count["fp"] else 0.0,
+                "recall": count["tp"] / (count["tp"] + count["fn"]) if count["tp"] + count["fn"] else 0.0,
+            }
+    totals = {key: sum(count[key] for count in counts.values()) for key in ("tp", "fp", "fn")}
+
+    report = {
+        "source": args.video or args.images,
+        "model": {"weights": args.weights, "checkpoint": checkpoint_hash(args.weights), "runtime": args.runtime, "path": model_path},
+        "settings": {"backend": args.backend, "imgsz": args.imgsz, "conf": args.conf, "iou": args.iou, "roi": roi is not None, "max_stride": max_stride, "mirror": args.mirror, "top_k": args.top_k, "agnostic_iou": args.agnostic_iou},
+        "latency": summarize_latencies(latencies),
+        "inferred_latency": summarize_latencies(inferred_latencies),
+        "skipped_latency": summarize_latencies(skipped_latencies),
+        "peak_rss_mb": peak_rss / 2**20,
+        "scheduler": detector.scheduler.stats(),
+        "stages": timings.stats(),
+        "scored_images": scored,
+        "precision": totals["tp"] / (totals["tp"] + totals["fp"]) if totals["tp"] + totals["fp"] else 0.0,
+        "recall": totals["tp"] / (totals["tp"] + totals["fn"]) if totals["tp"] + totals["fn"] else 0.0,
+        "per_class": per_class,
+        "decoded_text": detector.detected_text,
+    }
+
+    latency = report["latency"]
+    print(f"{latency['frames']} frames: {latency['fps']:.1f} fps  p50 {latency['p50_ms']:.1f} ms  p95 {latency['p95_ms']:.1f} ms  p99 {latency['p99_ms']:.1f} ms  peak RSS {report['peak_rss_mb']:.0f} MB")
+    for name in ("inferred", "skipped"):
+        part = report[f"{name}_latency"]
+        if part["frames"]:
+            print(f"  {name:>8}: {part['frames']} frames  p50 {part['p50_ms']:.1f} ms  p95 {part['p95_ms']:.1f} ms")
+    for stage in PIPELINE_STAGES:
+        if stage in report["stages"]:
+            print(f"  {stage:>11}: p50 {report['stages'][stage]['p50_ms']:7.2f} ms  p95 {report['stages'][stage]['p95_ms']:7.2f} ms")
+    if scored:
+        print(f"{scored} images scored: precision {report['precision']:.3f}  recall {report['recall']:.3f} (conf >= {args.conf}, IoU >= {args.iou})")
+        for letter, row in per_class.items():
+            print(f"  {letter}: precision {row['precision']:.3f}  recall {row['recall']:.3f}  (tp {row['tp']}, fp {row['fp']}, fn {row['fn']})")
+    if args.video:
+        print(f"decoded text: {report['decoded_text']}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="InSignia detector benchmarks")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    runtimes = subcommands.add_parser("runtimes", help="Compare torch / ONNX / OpenVINO on the same frames")
+    runtimes.add_argument("--runtimes", nargs="+", choices=RUNTIMES, help="Default: every runtime installed on this host")
+    runtimes.add_argument("--images", default=os.path.join("test", "images"))
+    runtimes.add_argument("--frames", type=int, default=100)
+    runtimes.add_argument("--warmup", type=int, default=5)
+    runtimes.add_argument("--weights", default="best.pt")
+    runtimes.add_argument("--imgsz", type=int, default=640)
+    runtimes.add_argument("--conf", type=float, default=0.6)
+    runtimes.add_argument("--cache-dir", default=os.getenv("MODEL_CACHE_DIR", ".model_cache"))
+    runtimes.add_argument("--json", help="Also write the results to this JSON file")
+    runtimes.set_defaults(handler=run_runtimes)
+
+    frames = subcommands.add_parser("frames", help="Measure per-frame allocations of the decode/mirror path")
+    frames.add_argument("--frames", type=int, default=300)
+    frames.add_argument("--width", type=int, default=1280)
+    frames.add_argument("--height", type=int, default=720)
+    frames.add_argument("--json", help="Also write the results to this JSON file")
+    frames.set_defaults(handler=run_frames)
+
+    detector = subcommands.add_parser("detector", help="Replay dataset images or a video through the camera pipeline; fps, latency, RSS, precision/recall")
+    source = detector.add_mutually_exclusive_group()
+    source.add_argument("--images", default=os.path.join("test", "images"), help="YOLO split images; labels are read from the sibling labels/ folder")
+    source.add_argument("--video", help="Recorded video file (no ground truth: throughput and decoded text only)")
+    detector.add_argument("--frames", type=int, default=0, help="Stop after this many frames (0 = all)")
+    detector.add_argument("--warmup", type=int, default=5, help="Frames left out of the latency figures")
+    detector.add_argument("--weights", default="best.pt")
+    detector.add_argument("--runtime", choices=RUNTIMES, default=os.getenv("INFERENCE_RUNTIME", "onnx").lower())
+    detector.add_argument("--backend", choices=("batch", "process"), default=os.getenv("INFERENCE_BACKEND", "batch").lower())
+    detector.add_argument("--workers", type=int, default=0)
+    detector.add_argument("--imgsz", type=int, default=int(os.getenv("DETECTION_IMGSZ", 640)))
+    detector.add_argument("--conf", type=float, default=0.6, help="Detection threshold, as on the camera page")
+    detector.add_argument("--iou", type=float, default=0.5, help="IoU for a prediction to match a ground-truth box")
+    detector.add_argument("--top-k", type=int, default=int(os.getenv("DETECTION_TOP_K", 5)))
+    detector.add_argument("--agnostic-iou", type=float, default=float(os.getenv("DETECTION_AGNOSTIC_NMS_IOU", 0)), help="Class-agnostic NMS IoU (0 = off)")
+    detector.add_argument("--roi", action=argparse.BooleanOptionalAction, default=None, help="Hand ROI tracking (default: on for video, off for images)")
+    detector.add_argument("--roi-imgsz", type=int, default=int(os.getenv("DETECTION_ROI_IMGSZ", 320)))
+    detector.add_argument("--max-stride", type=int, default=int(os.getenv("DETECTION_MAX_STRIDE", 6)))
+    detector.add_argument("--target-latency-ms", type=float, default=float(os.getenv("DETECTION_TARGET_LATENCY_MS", 40)))
+    detector.add_argument("--mirror", action=argparse.BooleanOptionalAction, default=False, help="Mirror frames like the webcam view")
+    detector.add_argument("--data", default="data.yaml")
+    detector.add_argument("--cache-dir", default=os.getenv("MODEL_CACHE_DIR", ".model_cache"))
+    detector.add_argument("--json", help="Also write the results to this JSON file")
+    detector.set_defaults(handler=run_detector)
+
+    startup = subcommands.add_parser("startup", help="Measure app cold start and per-rerun overhead for one page")
+    startup.add_argument("--app", default="app.py")
+    startup.add_argument("--page", help="Value of st.session_state.current_page, e.g. '📚 Kamus'; default: landing page")
+    startup.add_argument("--reruns", type=int, default=20)
+    startup.add_argument("--clicks", type=int, default=0, help="Also time this many sidebar navigation clicks")
+    startup.add_argument("--timeout", type=float, default=300)
+    startup.add_argument("--json", help="Also write the results to this JSON file")
+    startup.set_defaults(handler=run_startup)
+
+    args = parser.parse_args()
+    reports = args.handler(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# Sign-example catalog: class id -> ranked example images (with bbox) from a YOLO dataset split
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+CATALOG_VERSION = 1
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+
+# How examples are ranked within a class: biggest hand, or hand closest to the image centre
+RANKINGS = {
+    "largest": lambda cx, cy, w, h: w * h,
+    "centered": lambda cx, cy, w, h: 1.0 - ((cx - 0.5) ** 2 + (cy - 0.5) ** 2) ** 0.5,
+}
+
+_loaded = {}  # (dataset_folder, rank) -> (signature, catalog), so reruns don't even re-read the index
+_thumbnails = {}  # (id(catalog), size, fmt) -> (catalog, {class id: thumbnail path})
+
+
+def _directory_signature(dataset_folder):
+    # Adding, removing or renaming files bumps a directory's mtime; that is what invalidates the index
+    signature = []
+    for sub in ("labels", "images"):
+        try:
+            signature.append(os.stat(os.path.join(dataset_folder, sub)).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _parse_label_file(path):
+    boxes = []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 5:
+                boxes.append([parts[0]] + [float(v) for v in parts[1:5]])
+    return boxes
+
+
+def _scan(dataset_folder, previous_files):
+    # Re-parses only label files whose mtime/size changed since the last scan
+    label_folder = os.path.join(dataset_folder, "labels")
+    image_folder = os.path.join(dataset_folder, "images")
+
+    images = {}
+    if os.path.isdir(image_folder):
+        for entry in os.scandir(image_folder):
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() in IMAGE_EXTENSIONS:
+                images.setdefault(stem, entry.name)
+
+    files = {}
+    if os.path.isdir(label_folder):
+        for entry in os.scandir(label_folder):
+            if not entry.name.endswith(".txt"):
+                continue
+            stat = entry.stat()
+            stamp = [stat.st_mtime_ns, stat.st_size]
+            cached = previous_files.get(entry.name)
+            if cached and cached[0] == stamp:
+                files[entry.name] = cached
+            else:
+                files[entry.name] = [stamp, _parse_label_file(entry.path)]
+    return images, files
+
+
+def _rank(dataset_folder, images, files, rank, top_k):
+    score = RANKINGS[rank]
+    image_folder = os.path.join(dataset_folder, "images")
+    candidates = {}
+    for name, (_, boxes) in files.items():
+        image_name = images.get(name[:-len(".txt")])
+        if not image_name:
+            continue
+        for class_id, cx, cy, w, h in boxes:
+            candidates.setdefault(class_id, []).append({
+                "image": os.path.join(image_folder, image_name),
+                "bbox": [cx, cy, w, h],
+                "score": round(score(cx, cy, w, h), 6),
+            })
+    # Ties broken by file name so rebuilds are deterministic
+    return {
+        class_id: sorted(examples, key=lambda e: (-e["score"], e["image"]))[:top_k]
+        for class_id, examples in candidates.items()
+    }
+
+
+def load_catalog(dataset_folder="train", rank="largest", top_k=5, cache_dir=".catalog_cache"):
+    if rank not in RANKINGS:
+        raise ValueError(f"Unknown ranking '{rank}', expected one of {sorted(RANKINGS)}")
+
+    signature = _directory_signature(dataset_folder)
+    memo = _loaded.get((dataset_folder, rank))
+    if memo and memo[0] == signature:
+        return memo[1]
+
+    # One small index file per (split, ranking) for fast startup, plus a larger per-file
+    # record that is only read when the dataset changed and needs an incremental rebuild
+    os.makedirs(cache_dir, exist_ok=True)
+    split = os.path.basename(os.path.normpath(dataset_folder)) or "dataset"
+    index_path = os.path.join(cache_dir, f"{split}-{rank}.json")
+    files_path = os.path.join(cache_dir, f"{split}-files.json")
+
+    index = _read_json(index_path)
+    if index and index.get("version") == CATALOG_VERSION and index.get("signature") == signature and index.get("top_k") == top_k:
+        catalog = index["classes"]
+    else:
+        previous = _read_json(files_path) or {}
+        previous_files = previous.get("files", {}) if previous.get("version") == CATALOG_VERSION else {}
+        images, files = _scan(dataset_folder, previous_files)
+        catalog = _rank(dataset_folder, images, files, rank, top_k)
+        _write_json(files_path, {"version": CATALOG_VERSION, "files": files})
+        _write_json(index_path, {"version": CATALOG_VERSION, "signature": signature, "top_k": top_k, "classes": catalog})
+
+    _loaded[(dataset_folder, rank)] = (signature, catalog)
+    return catalog
+
+
+# --- Grid thumbnails ---
+# The dictionary and speech pages show one example per letter in a 6-column grid.
+# Instead of shipping full-resolution dataset JPEGs on every rerun, the best example of
+# each class is cropped around its hand box and saved once at grid size. Thumbnail
+# names include the source mtime and bbox, so a new best example gets a new file.
+def _render_thumbnail(image_path, bbox, path, size, fmt):
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        image = image.convert("RGB")
+        width, height = image.size
+        cx, cy, w, h = bbox
+        side = min(max(w * width, h * height) * 1.6, width, height)
+        left = min(max(cx * width - side / 2, 0), width - side)
+        top = min(max(cy * height - side / 2, 0), height - side)
+        thumbnail = image.crop((int(left), int(top), int(left + side), int(top + side))).resize((size, size), Image.LANCZOS)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    thumbnail.save(tmp_path, format=fmt.upper(), quality=80)
+    os.replace(tmp_path, path)
+
+
+def build_thumbnails(catalog, cache_dir=".catalog_cache", size=192, fmt="webp"):
+    memo = _thumbnails.get((id(catalog), size, fmt))
+    if memo and memo[0] is catalog:
+        return memo[1]
+
+    folder = os.path.join(cache_dir, "thumbnails")
+    thumbnails = {}
+    for class_id, examples in catalog.items():
+        if not examples:
+            continue
+        best = examples[0]
+        try:
+            mtime = os.stat(best["image"]).st_mtime_ns
+        except OSError:
+            continue
+        key = hashlib.sha1(f"{best['image']}|{mtime}|{best['bbox']}|{size}".encode()).hexdigest()[:12]
+        path = os.path.join(folder, f"{class_id}-{key}.{fmt}")
+        if not os.path.exists(path):
+            try:
+                _render_thumbnail(best["image"], best["bbox"], path, size, fmt)
+            except OSError:
+                continue
+        thumbnails[class_id] = path
+
+    _thumbnails[(id(catalog), size, fmt)] = (catalog, thumbnails)
+    return thumbnails
+
+
+# Encoded thumbnail bytes kept in memory; repeated letters in a sentence share one entry
+@lru_cache(maxsize=256)
+def thumbnail_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
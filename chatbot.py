@@ -0,0 +1,320 @@
+# InSignia Bot helpers: streamed Azure OpenAI completions and chat bubble HTML
+import html
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from types import SimpleNamespace
+
+
+# Chat bubbles are rendered to HTML once per message and kept alongside the history,
+# so a rerun only joins cached strings instead of re-escaping every past message
+def render_message(message):
+    content = html.escape(message["content"])
+    if message["role"] == "user":
+        return f"""
+        <div class="chat-row user-row">
+            <div class="chat-message-container user-message">
+                <p>{content}</p>
+            </div>
+            <div class="chat-avatar" style="background-color: #555;">😎</div>
+        </div>
+        """
+    return f"""
+    <div class="chat-row bot-row">
+        <div class="chat-avatar">🤖</div>
+        <div class="chat-message-container bot-message">
+            <p>{content}</p>
+        </div>
+    </div>
+    """
+
+
+def stream_reply(client, messages, model="gpt-4", temperature=0.7, max_tokens=500):
+    # Yields text deltas as they arrive
+    stream = client.chat.completions.create(model=model, messages=messages, temperature=temperature, max_tokens=max_tokens, stream=True)
+    for chunk in stream:
+        # Azure sends content-filter chunks with no choices, and the final chunk has no content
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def render_stream(deltas, placeholder, min_interval=0.05):
+    # Draws the growing reply into one bubble, throttled so a fast stream doesn't send
+    # a UI update per token; returns the full text
+    text = ""
+    last_draw = 0.0
+    for delta in deltas:
+        text += delta
+        now = time.monotonic()
+        if now - last_draw >= min_interval:
+            placeholder.markdown(render_message({"role": "assistant", "content": text + "▌"}), unsafe_allow_html=True)
+            last_draw = now
+    placeholder.markdown(render_message({"role": "assistant", "content": text}), unsafe_allow_html=True)
+    return text
+
+
+# --- Conversation context ---
+# Token counts are estimated locally, without a tokenizer dependency: about four characters
+# per token for words, one per punctuation mark, plus the framing each chat message adds.
+# It runs a little high for English and close for Indonesian, which is the safe side for a budget.
+MESSAGE_OVERHEAD_TOKENS = 4
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def message_tokens(message):
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def truncate_tokens(text, budget):
+    if count_tokens(text) <= budget:
+        return text
+    # The " …" marker is a token itself, so the cut leaves room for it
+    budget -= count_tokens("…")
+    used = 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        used += (len(match.group()) + 3) // 4
+        if used > budget:
+            return text[:match.start()].rstrip() + " …"
+    return text
+
+
+def _turns(messages):
+    # A turn is a user message plus the replies that follow it, so context never keeps a question without its answer
+    turns = []
+    for message in messages:
+        if message["role"] == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _words(text):
+    return set(normalize_query(text).split())
+
+
+def build_context(system_prompt, history, budget, summary=""):
+    # history ends with the current user message. Always sent: system prompt, running summary
+    # and the current message (cut to fit). Earlier turns fill what is left of the budget,
+    # ranked by recency plus word overlap with the current message, and keep their order.
+    system = [{"role": "system", "content": system_prompt}]
+    if summary:
+        system.append({"role": "system", "content": f"Ringkasan percakapan sebelumnya: {summary}"})
+    remaining = budget - sum(message_tokens(message) for message in system)
+
+    latest = history[-1]
+    if message_tokens(latest) > remaining:
+        latest = {**latest, "content": truncate_tokens(latest["content"], max(remaining - MESSAGE_OVERHEAD_TOKENS, 0))}
+    remaining -= message_tokens(latest)
+
+    turns = _turns(history[:-1])
+    query_words = _words(latest["content"])
+
+    def score(i):
+        words = _words(" ".join(message["content"] for message in turns[i]))
+        overlap = len(words & query_words) / len(words | query_words) if words | query_words else 0.0
+        return (i + 1) / len(turns) + overlap
+
+    chosen = []
+    for i in sorted(range(len(turns)), key=score, reverse=True):
+        cost = sum(message_tokens(message) for message in turns[i])
+        if cost <= remaining:
+            chosen.append(i)
+            remaining -= cost
+    return system + [message for i in sorted(chosen) for message in turns[i]] + [latest]
+
+
+def history_overflow(messages, limit):
+    # How many of the oldest messages to drop once the history passes `limit`: down to half
+    # the limit (so summarizing happens once per several turns), on a turn boundary
+    if len(messages) <= limit:
+        return 0
+    count = len(messages) - limit // 2
+    while count < len(messages) - 1 and messages[count]["role"] != "user":
+        count += 1
+    return min(count, len(messages) - 1)
+
+
+def summarize_turns(client, summary, messages, model="gpt-4", max_tokens=150):
+    # Folds dropped turns into the running summary: one short completion per trim, with a
+    # local fallback (the user's earlier questions) if the service is unavailable
+    transcript = "\n".join(f"{message['role']}: {truncate_tokens(message['content'], 200)}" for message in messages)
+    if summary:
+        transcript = f"Ringkasan sebelumnya: {summary}\n\n{transcript}"
+    prompt = [
+        {"role": "system", "content": "Ringkas percakapan berikut dalam maksimal tiga kalimat bahasa Indonesia. Pertahankan topik dan fakta penting yang ditanyakan pengguna."},
+        {"role": "user", "content": transcript},
+    ]
+    try:
+        response = client.chat.completions.create(model=model, messages=prompt, temperature=0.3, max_tokens=max_tokens)
+        text = (response.choices[0].message.content or "").strip()
+    except Exception:
+        text = ""
+    if not text:
+        questions = "; ".join(message["content"] for message in messages if message["role"] == "user")
+        text = " ".join(part for part in (summary, f"Pengguna sebelumnya bertanya: {questions}." if questions else "") if part)
+    return truncate_tokens(text, max_tokens)
+
+
+# --- Semantic response cache ---
+# Most traffic is the same few dozen FAQ questions. Queries are normalized (case,
+# punctuation, spacing) and compared by character-trigram cosine similarity, so
+# "Apa itu SIBI?" and "apa itu sibi" or "apa itu SIBI ya" hit the same entry.
+# Letters, numbers and other one-character tokens must match exactly, though: "huruf A"
+# and "huruf B" are near-identical strings with different answers. Entries expire after `ttl` seconds, the cache is LRU-bounded to `max_entries`,
+# and it is saved to `path` so it survives restarts.
+def normalize_query(text):
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _distinguishing(text):
+    return frozenset(word for word in text.split() if len(word) == 1 or any(c.isdigit() for c in word))
+
+
+def _cosine(a, norm_a, b, norm_b):
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b.get(gram, 0) for gram, count in a.items())
+    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+
+
+class ResponseCache:
+    def __init__(self, path=None, threshold=0.85, ttl=7 * 24 * 3600, max_entries=512):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self._entries = OrderedDict()  # normalized query -> {"response", "latency", "created"}
+        self._vectors = {}             # normalized query -> (trigram counts, norm, distinguishing tokens)
+        self._lock = threading.Lock()
+        self._load()
+
+    def _vector(self, key):
+        grams = _trigrams(key)
+        return grams, math.sqrt(sum(count * count for count in grams.values())), _distinguishing(key)
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in entries:
+            if now - entry["created"] < self.ttl:
+                self._entries[key] = entry
+                self._vectors[key] = self._vector(key)
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(self._entries.items()), f)
+        os.replace(tmp_path, self.path)
+
+    def _evict(self, key):
+        self._entries.pop(key, None)
+        self._vectors.pop(key, None)
+
+    def get(self, query):
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            match = key if key in self._entries else None
+            if match is None and key:
+                grams, norm, tokens = self._vector(key)
+                best = self.threshold
+                for candidate, (candidate_grams, candidate_norm, candidate_tokens) in self._vectors.items():
+                    if candidate_tokens != tokens:
+                        continue
+                    similarity = _cosine(grams, norm, candidate_grams, candidate_norm)
+                    if similarity >= best:
+                        match, best = candidate, similarity
+
+            if match is not None and now - self._entries[match]["created"] >= self.ttl:
+                self._evict(match)
+                match = None
+            if match is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(match)
+            entry = self._entries[match]
+            self.hits += 1
+            self.saved_seconds += entry["latency"]
+            return entry["response"]
+
+    def put(self, query, response, latency):
+        key = normalize_query(query)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = {"response": response, "latency": latency, "created": time.time()}
+            self._entries.move_to_end(key)
+            self._vectors[key] = self._vector(key)
+            while len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+            self._save()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
+
+
+# --- Local fake streaming endpoint ---
+# Mimics client.chat.completions.create(stream=True) with canned chunks and an
+# optional delay per chunk, for trying the page without Azure credentials.
+class FakeStreamingClient:
+    def __init__(self, reply, chunk_size=4, delay=0.02, first_token_delay=0.3, keep_requests=20):
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.delay = delay
+        self.first_token_delay = first_token_delay
+        self.requests = deque(maxlen=keep_requests)  # the latest requests, for inspection; bounded for long-running servers
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _chunk(self, content):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    def _create(self, stream=False, **kwargs):
+        self.requests.append(kwargs)
+        if not stream:
+            message = SimpleNamespace(content=self.reply)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._stream()
+
+    def _stream(self):
+        yield SimpleNamespace(choices=[])  # content-filter preamble
+        time.sleep(self.first_token_delay)
+        for start in range(0, len(self.reply), self.chunk_size):
+            yield self._chunk(self.reply[start:start + self.chunk_size])
+            time.sleep(self.delay)
+        yield self._chunk(None)
@@ -0,0 +1,475 @@
+# Per-frame helpers for the SIBI detection stream (used by SignLanguageDetector in app.py)
+import math
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+import numpy as np
+
+from inference import postprocess
+from timings import StageTimings
+
+
+# --- Adaptive frame scheduling ---
+# Measures how long inference takes and picks a stride N (run the model on every Nth
+# frame, reuse the last boxes in between) so the average cost per frame stays under
+# the target latency. Frames that arrive too late are skipped instead of queued.
+# Drops are also passed to sink(reason, count) if given (e.g. the Prometheus counter).
+# max_frame_age_ms <= 0 turns staleness off (offline replay, where frames never fall behind).
+class FrameScheduler:
+    def __init__(self, target_latency_ms=50, max_stride=8, max_frame_age_ms=200, smoothing=0.2, sink=None, lag_window_s=10):
+        self.target_latency = target_latency_ms / 1000
+        self.max_stride = max(1, int(max_stride))
+        self.max_frame_age = max_frame_age_ms / 1000
+        self.lag_window = lag_window_s
+        self.smoothing = smoothing
+        self.sink = sink
+
+        self.stride = 1
+        self.inference_time = None  # moving average (seconds) of one model call
+        self.overhead_time = None   # moving average (seconds) of a frame without inference
+        self.latency = None         # moving average (seconds) of every frame, inference or not
+        self.frames = 0
+        self.inferred = 0
+        self.dropped = 0
+
+        self._since_inference = 0
+        self._lags = deque()  # (arrival, lag) with increasing lags: the front is the window's minimum
+
+    def _average(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.smoothing * (sample - current)
+
+    def is_stale(self, frame_time):
+        # frame.time is stream time, so "now - frame_time" has an unknown offset. The smallest lag
+        # over the last lag_window seconds approximates it; anything well above that is backlog.
+        # A sliding minimum (not the all-time one) follows clock drift between browser and server.
+        if frame_time is None or self.max_frame_age <= 0:
+            return False
+        now = time.monotonic()
+        lag = now - frame_time
+        while self._lags and self._lags[-1][1] >= lag:
+            self._lags.pop()
+        self._lags.append((now, lag))
+        while self._lags[0][0] < now - self.lag_window:
+            self._lags.popleft()
+        return lag - self._lags[0][1] > self.max_frame_age
+
+    def should_infer(self, frame_time=None):
+        self.frames += 1
+        if self.is_stale(frame_time):
+            self.record_dropped(1, "stale")
+            return False
+        if self._since_inference + 1 >= self.stride:
+            self._since_inference = 0
+            return True
+        self._since_inference += 1
+        return False
+
+    def record_inference(self, seconds):
+        self.inferred += 1
+        self.inference_time = self._average(self.inference_time, seconds)
+        self._update_stride()
+
+    def record_frame(self, seconds, inferred):
+        if not inferred:
+            self.overhead_time = self._average(self.overhead_time, seconds)
+        self.latency = self._average(self.latency, seconds)
+
+    def record_dropped(self, count, reason="queued"):
+        self.dropped += count
+        if self.sink and count:
+            self.sink(reason, count)
+
+    def _update_stride(self):
+        # Average cost with stride N: (inference + (N - 1) * overhead) / N <= target
+        overhead = self.overhead_time or 0.0
+        if self.inference_time <= self.target_latency:
+            stride = 1
+        elif overhead >= self.target_latency:
+            stride = self.max_stride
+        else:
+            stride = math.ceil((self.inference_time - overhead) / (self.target_latency - overhead))
+        self.stride = min(max(stride, 1), self.max_stride)
+
+    def stats(self):
+        return {
+            "stride": self.stride,
+            "target_latency_ms": self.target_latency * 1000,
+            "latency_ms": (self.latency or 0.0) * 1000,
+            "inference_ms": (self.inference_time or 0.0) * 1000,
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "dropped": self.dropped,
+        }
+
+
+# --- Region of interest around the tracked hand ---
+# Once a hand has been found, the next inferences only look at a padded square
+# around the last box at a smaller input size. A miss, or every Kth inference,
+# goes back to a full-frame scan so a hand entering elsewhere is still picked up.
+class RoiTracker:
+    def __init__(self, roi_imgsz=320, full_scan_every=15, padding=0.6, min_crop=192):
+        self.roi_imgsz = roi_imgsz
+        self.full_scan_every = max(1, int(full_scan_every))
+        self.padding = padding
+        self.min_crop = min_crop
+
+        self.box = None  # last hand box in full-frame coordinates
+        self._since_full_scan = 0
+        self.roi_inferences = 0
+        self.full_inferences = 0
+
+    def region(self, frame_shape):
+        # Returns (x0, y0, x1, y1) to crop, or None for a full-frame scan
+        if self.box is None or self._since_full_scan >= self.full_scan_every:
+            return None
+
+        height, width = frame_shape[:2]
+        x1, y1, x2, y2 = self.box
+        side = max(x2 - x1, y2 - y1) * (1 + 2 * self.padding)
+        side = int(min(max(side, self.min_crop), width, height))
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        x0 = int(min(max(cx - side / 2, 0), width - side))
+        y0 = int(min(max(cy - side / 2, 0), height - side))
+        return x0, y0, x0 + side, y0 + side
+
+    def to_frame(self, detections, region):
+        # Shift crop-relative boxes back into full-frame coordinates
+        if region is None or not len(detections.cls):
+            return detections
+        offset = np.array([region[0], region[1], region[0], region[1]], dtype=detections.xyxy.dtype)
+        return detections._replace(xyxy=detections.xyxy + offset)
+
+    def update(self, detections, region):
+        if region is None:
+            self.full_inferences += 1
+            self._since_full_scan = 0
+        else:
+            self.roi_inferences += 1
+            self._since_full_scan += 1
+
+        if len(detections.cls):
+            best = int(np.argmax(detections.conf))
+            self.box = tuple(float(v) for v in detections.xyxy[best])
+        else:
+            self.box = None
+
+    def stats(self):
+        total = self.roi_inferences + self.full_inferences
+        return {
+            "tracking": self.box is not None,
+            "roi_share": self.roi_inferences / total if total else 0.0,
+        }
+
+
+# --- Temporal letter decoder ---
+# Turns per-inference detections into spelled text. The last `window` observations
+# (best class and confidence, or a blank when no hand is seen) are kept with running
+# per-class sums, so each update costs the same no matter how long the stream runs.
+# A letter is committed once it leads the vote with enough share and confidence for
+# `min_dwell` seconds. Like a CTC collapse, the same letter is only committed again
+# after something else (usually a blank) has led in between, so a flickering box
+# can't turn "AB" into "ABAB".
+class LetterDecoder:
+    def __init__(self, labels, window=8, min_dwell=0.4, vote_ratio=0.6, min_conf=0.7):
+        self.labels = labels
+        self.blank = len(labels)
+        self.window = max(1, int(window))
+        self.min_dwell = min_dwell
+        self.vote_ratio = vote_ratio
+        self.min_conf = min_conf
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.tentative = ""
+        self._history = deque(maxlen=self.window)
+        self._scores = np.zeros(self.blank + 1, dtype=np.float64)
+        self._counts = np.zeros(self.blank + 1, dtype=np.int64)
+        self._leader = None
+        self._leader_since = 0.0
+        self._last_committed = self.blank
+
+    @property
+    def leader_since(self):
+        # When the current leading letter took the lead (its start time once committed)
+        return self._leader_since
+
+    def update(self, classes, confidences, now):
+        # Returns the newly committed letter, if any
+        if len(classes):
+            best = int(np.argmax(confidences))
+            observation = (int(classes[best]), float(confidences[best]))
+        else:
+            observation = (self.blank, 1.0)
+
+        if len(self._history) == self.window:
+            old_cls, old_conf = self._history[0]
+            self._scores[old_cls] -= old_conf
+            self._counts[old_cls] -= 1
+        self._history.append(observation)
+        self._scores[observation[0]] += observation[1]
+        self._counts[observation[0]] += 1
+
+        leader = int(np.argmax(self._scores))
+        share = self._counts[leader] / len(self._history)
+        mean_conf = self._scores[leader] / self._counts[leader]
+        if share < self.vote_ratio or (leader != self.blank and mean_conf < self.min_conf):
+            leader = None  # no clear winner yet
+
+        if leader != self._leader:
+            self._leader = leader
+            self._leader_since = now
+
+        if leader is None or leader == self._last_committed:
+            self.tentative = ""
+            return None
+        if leader == self.blank:
+            # Hand dropped or paused: the next letter may repeat the previous one
+            self._last_committed = self.blank
+            self.tentative = ""
+            return None
+
+        letter = self.labels.get(leader, "?")
+        if now - self._leader_since < self.min_dwell:
+            self.tentative = letter
+            return None
+
+        self.text += letter
+        self.tentative = ""
+        self._last_committed = leader
+        return letter
+
+
+# --- Detector <-> UI channel ---
+# The video thread must not touch st.session_state. Instead each session gets a
+# DetectionChannel (video thread -> page) and a DetectorConfig (page -> video thread).
+DetectionEvent = namedtuple("DetectionEvent", ["seq", "time", "letter", "text", "tentative"])
+
+
+# Single-producer ring buffer: the video thread writes the slot first and only then
+# advances the sequence number, so a reader never sees an event before it is complete.
+# No locks; a reader that falls more than `capacity` events behind just skips ahead.
+class DetectionChannel:
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._next_seq = 0
+
+    def publish(self, letter, text, tentative):
+        seq = self._next_seq
+        self._slots[seq % self.capacity] = DetectionEvent(seq, time.time(), letter, text, tentative)
+        self._next_seq = seq + 1
+
+    def latest(self):
+        seq = self._next_seq - 1
+        return self._slots[seq % self.capacity] if seq >= 0 else None
+
+    def read(self, after_seq=-1):
+        end = self._next_seq
+        start = max(after_seq + 1, end - self.capacity)
+        events = [self._slots[seq % self.capacity] for seq in range(start, end)]
+        # Drop slots the writer lapped while we were copying
+        return [event for event in events if event is not None and event.seq >= start]
+
+
+DetectorSettings = namedtuple("DetectorSettings", ["threshold", "show_fps", "reset_token"])
+
+
+# Settings are an immutable tuple swapped in one assignment, so the video thread
+# always reads a consistent snapshot without locking. Bumping reset_token asks the
+# detector to clear its text.
+class DetectorConfig:
+    def __init__(self, threshold=0.6, show_fps=True):
+        self._settings = DetectorSettings(threshold, show_fps, 0)
+        self._lock = threading.Lock()  # serializes writers only
+
+    def get(self):
+        return self._settings
+
+    def update(self, **changes):
+        with self._lock:
+            if any(getattr(self._settings, key) != value for key, value in changes.items()):
+                self._settings = self._settings._replace(**changes)
+
+    def request_reset(self):
+        with self._lock:
+            self._settings = self._settings._replace(reset_token=self._settings.reset_token + 1)
+
+
+# --- Reusable frame buffers ---
+# One instance per session. Decoding and mirroring write into buffers that are
+# allocated once per frame size, and annotation draws straight into the mirrored
+# buffer, so the only per-frame allocations left are PyAV's plane copy and the
+# outgoing av.VideoFrame the encoder needs anyway.
+class FrameBuffers:
+    def __init__(self):
+        self._buffers = {}
+
+    def _buffer(self, name, shape):
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buffer
+
+    def decode(self, frame):
+        # WebRTC frames arrive as I420: copy the planes (1.5 bytes/pixel) and let OpenCV
+        # convert into a reused BGR buffer instead of PyAV allocating a fresh 3 bytes/pixel array
+        if frame.format.name == "yuv420p" and frame.width % 2 == 0 and frame.height % 2 == 0:
+            bgr = self._buffer("bgr", (frame.height, frame.width, 3))
+            cv2.cvtColor(frame.to_ndarray(), cv2.COLOR_YUV2BGR_I420, dst=bgr)
+            return bgr
+        return frame.to_ndarray(format="bgr24")
+
+    def mirror(self, bgr):
+        mirrored = self._buffer("mirrored", bgr.shape)
+        cv2.flip(bgr, 1, dst=mirrored)
+        return mirrored
+
+    def decode_mirrored(self, frame):
+        return self.mirror(self.decode(frame))
+
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+
+# --- Performance overlay ---
+# Small text block in the top-left corner of the frame (drawn when show_fps is on)
+OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX
+OVERLAY_SCALE = 0.6
+OVERLAY_LINE_HEIGHT = 22
+
+
+def draw_overlay(img, lines, color=(255, 255, 255), background=(0, 0, 0)):
+    if not lines:
+        return
+    width = max(cv2.getTextSize(line, OVERLAY_FONT, OVERLAY_SCALE, 1)[0][0] for line in lines)
+    cv2.rectangle(img, (0, 0), (width + 16, OVERLAY_LINE_HEIGHT * len(lines) + 10), background, -1)
+    for i, line in enumerate(lines):
+        cv2.putText(img, line, (8, OVERLAY_LINE_HEIGHT * (i + 1)), OVERLAY_FONT, OVERLAY_SCALE, color, 1, cv2.LINE_AA)
+
+
+# --- Detection pipeline ---
+# Everything SignLanguageDetector (app.py) does to a camera frame, without Streamlit or
+# WebRTC, so benchmark.py can replay images or video through exactly the same code.
+BOX_COLOR = (255, 0, 255)  # purple (BGR)
+BOX_THICKNESS = 4
+
+
+class SignDetector:
+    def __init__(self, backend, labels, decoder, scheduler, roi=None, imgsz=640, channel=None, config=None, timings=None, overlay_refresh=0.5, mirror=True,
+                 classes=None, top_k=0, agnostic_iou=0.0):
+        # Results go out through `channel`, settings come in through `config`
+        self.backend = backend
+        self.labels = labels
+        self.decoder = decoder
+        self.scheduler = scheduler
+        self.roi = roi
+        self.imgsz = imgsz
+        self.channel = channel or DetectionChannel()
+        self.config = config or DetectorConfig()
+        self.timings = timings or StageTimings()
+        self.overlay_refresh = overlay_refresh
+        self.mirror = mirror  # selfie view for the webcam; off when replaying a dataset against its labels
+        self.classes = classes  # post-processing: allowed class ids (None = all), top-k, class-agnostic NMS IoU (0 = off)
+        self.top_k = top_k
+        self.agnostic_iou = agnostic_iou
+
+        self._reset_token = self.config.get().reset_token
+        self.buffers = FrameBuffers()
+        self.last_boxes = np.empty((0, 5), dtype=np.int32)  # x1, y1, x2, y2, class index from the most recent inference
+        self.last_detections = None
+        self.fps = 0.0
+        self._last_frame_at = None
+        self._overlay_lines = []
+        self._overlay_at = 0.0
+
+    @property
+    def detected_text(self):
+        return self.decoder.text
+
+    def detect(self, img, conf):
+        region = self.roi.region(img.shape) if self.roi else None
+        if region is not None:
+            x0, y0, x1, y1 = region
+            detections = self.backend.predict(img[y0:y1, x0:x1], imgsz=self.roi.roi_imgsz, conf=conf)
+            detections = self.roi.to_frame(detections, region)
+            self.roi.update(detections, region)
+            if len(detections.cls):
+                return detections
+        # Full-frame scan: no hand tracked yet, periodic re-scan, or the crop missed
+        detections = self.backend.predict(img, imgsz=self.imgsz, conf=conf)
+        if self.roi:
+            self.roi.update(detections, None)
+        return detections
+
+    def draw_stats(self, img):
+        # Text is rebuilt at the overlay refresh rate, so it stays readable and costs one putText pass per line
+        now = time.monotonic()
+        if now - self._overlay_at >= self.overlay_refresh:
+            self._overlay_at = now
+            recent = self.timings.recent
+            self._overlay_lines = [
+                f"FPS {self.fps:4.1f}  latensi {recent.get('total', 0) * 1000:3.0f} ms",
+                f"inferensi {recent.get('inference', 0) * 1000:3.0f} ms  stride 1/{self.scheduler.stride}",
+            ]
+        draw_overlay(img, self._overlay_lines)
+
+    def transform(self, frame):
+        started = time.perf_counter()
+        if self._last_frame_at is not None:
+            rate = 1 / max(started - self._last_frame_at, 1e-6)
+            self.fps = rate if not self.fps else self.fps + 0.1 * (rate - self.fps)
+        self._last_frame_at = started
+
+        img = self.buffers.decode(frame)
+        decoded = time.perf_counter()
+        if self.mirror:
+            img = self.buffers.mirror(img)  # into a reused buffer
+        self.timings.record("decode", decoded - started)
+        self.timings.record("mirror", time.perf_counter() - decoded)
+
+        settings = self.config.get()
+        if settings.reset_token != self._reset_token:
+            self._reset_token = settings.reset_token
+            self.decoder.reset()
+            self.channel.publish(None, "", "")
+
+        inferred = self.scheduler.should_infer(frame.time)
+        if inferred:
+            infer_started = time.perf_counter()
+            detections = postprocess(self.detect(img, settings.threshold), self.classes, self.top_k, self.agnostic_iou)
+            inference_time = time.perf_counter() - infer_started
+            self.scheduler.record_inference(inference_time)
+            self.timings.record("inference", inference_time)
+            self.last_detections = detections
+
+            previous_tentative = self.decoder.tentative
+            letter = self.decoder.update(detections.cls, detections.conf, time.monotonic())
+            if letter or self.decoder.tentative != previous_tentative:
+                self.channel.publish(letter, self.decoder.text, self.decoder.tentative)
+
+            self.last_boxes = np.empty((len(detections.cls), 5), dtype=np.int32)
+            self.last_boxes[:, :4] = detections.xyxy  # truncates like int()
+            self.last_boxes[:, 4] = detections.cls
+
+        # Skipped frames reuse the boxes from the last inference
+        draw_started = time.perf_counter()
+        if len(self.last_boxes):
+            # Every box outline in one call (same pixels as cv2.rectangle per box)
+            corners = self.last_boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+            cv2.polylines(img, corners, True, BOX_COLOR, BOX_THICKNESS)
+            # Label glyphs are rasterized once per letter by the label table; each is a masked copy
+            for x1, y1, _, _, cls in self.last_boxes.tolist():
+                self.labels.draw(img, cls, (x1, y1 - 20), BOX_COLOR)
+        if settings.show_fps:
+            self.draw_stats(img)
+        self.timings.record("draw", time.perf_counter() - draw_started)
+
+        elapsed = time.perf_counter() - started
+        self.scheduler.record_frame(elapsed, inferred)
+        self.timings.record("total", elapsed)
+        return img
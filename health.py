@@ -0,0 +1,127 @@
+# Replica readiness: warm the detection model up in the background and report when it is ready
+#   - status file (JSON) rewritten on every state change, for exec/file-based probes
+#   - optional HTTP endpoint: GET /ready -> 200 when ready, 503 otherwise (GET /status for the JSON)
+import json
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+STATES = ("pending", "loading", "warming", "ready", "failed")
+
+
+# The first predict in a fresh process pays for weight loading, kernel selection and
+# allocator growth. ModelWarmup builds the backend and pushes a few blank frames through
+# it at every input size the detector uses, so the first real frame runs at full speed.
+# Process-pool backends get one frame per worker per round, so every worker warms up.
+# A warm-up inference that takes longer than `timeout` seconds counts as a failure.
+class ModelWarmup:
+    def __init__(self, backend_factory, sizes=(640,), runs=3, frame_shape=(720, 1280, 3), status_path=None, timeout=60):
+        self.backend_factory = backend_factory
+        self.sizes = tuple(sizes)
+        self.runs = runs
+        self.timeout = timeout
+        self.frame_shape = frame_shape
+        self.status_path = status_path
+
+        self.state = "pending"
+        self.error = None
+        self.started_at = None
+        self.ready_at = None
+        self.warmup_ms = {}  # imgsz -> latency of the last warm-up round
+        self._ready = threading.Event()
+        self._thread = None
+        self._write_status()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def start(self):
+        # Also retries after a failure (e.g. weights missing when the replica started)
+        if self._thread is None or (self.state == "failed" and not self._thread.is_alive()):
+            self._ready.clear()
+            self._thread = threading.Thread(target=self._run, name="insignia-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        self._ready.wait(timeout)
+        return self.ready
+
+    def _set_state(self, state, error=None):
+        self.state = state
+        self.error = error
+        self._write_status()
+
+    def _run(self):
+        self.started_at = time.time()
+        try:
+            self._set_state("loading")
+            backend = self.backend_factory()
+            self._set_state("warming")
+            frame = np.zeros(self.frame_shape, dtype=np.uint8)
+            concurrency = getattr(backend, "workers", 1)
+            for imgsz in self.sizes:
+                for _ in range(self.runs):
+                    started = time.perf_counter()
+                    futures = [backend.submit(frame, imgsz=imgsz) for _ in range(concurrency)]
+                    for future in futures:
+                        try:
+                            future.result(self.timeout)
+                        except FutureTimeoutError:
+                            raise TimeoutError(f"warm-up inference at {imgsz}px took longer than {self.timeout} s")
+                    self.warmup_ms[imgsz] = (time.perf_counter() - started) * 1000
+            self.ready_at = time.time()
+            self._set_state("ready")
+        except Exception as e:
+            self._set_state("failed", f"{type(e).__name__}: {e}")
+        finally:
+            self._ready.set()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "error": self.error,
+            "started_at": self.started_at,
+            "ready_at": self.ready_at,
+            "load_s": self.ready_at - self.started_at if self.ready_at else None,
+            "warmup_ms": {str(imgsz): ms for imgsz, ms in self.warmup_ms.items()},
+            "pid": os.getpid(),
+        }
+
+    def _write_status(self):
+        if not self.status_path:
+            return
+        os.makedirs(os.path.dirname(self.status_path) or ".", exist_ok=True)
+        tmp_path = f"{self.status_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.status(), f)
+        os.replace(tmp_path, self.status_path)
+
+
+def serve_health(warmup, port, host="0.0.0.0"):
+    # Small HTTP server on its own port; Streamlit's /_stcore/health only says the server is up
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") in ("/ready", "/status"):
+                ready = warmup.ready
+                body = json.dumps(warmup.status()).encode()
+                self.send_response(200 if ready or self.path.startswith("/status") else 503)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            else:
+                self.send_error(404)
+
+        def log_message(self, format, *args):
+            pass  # load balancer polls would flood the app log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="insignia-health", daemon=True).start()
+    return server
@@ -0,0 +1,414 @@
+# Model inference backends shared by every detection session
+import atexit
+import hashlib
+import importlib.util
+import itertools
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+# Backend-neutral detection output: xyxy (N, 4) float32, conf (N,) float32, cls (N,) int
+Detections = namedtuple("Detections", ["xyxy", "conf", "cls"])
+
+
+def model_speed(result):
+    # Ultralytics' per-image timings (ms) -> seconds under the pipeline stage names
+    speed = getattr(result, "speed", None) or {}
+    return {stage: speed[key] / 1000 for stage, key in (("preprocess", "preprocess"), ("model", "inference"), ("postprocess", "postprocess")) if speed.get(key) is not None}
+
+
+def to_detections(result, min_conf=None):
+    # boxes.data is (N, 6) = x1, y1, x2, y2, conf, cls: one device -> host copy for all fields
+    data = result.boxes.data
+    data = np.asarray(data.cpu().numpy() if hasattr(data, "cpu") else data, dtype=np.float32).reshape(-1, 6)
+    if min_conf is not None:
+        data = data[data[:, 4] >= min_conf]
+    return Detections(np.ascontiguousarray(data[:, :4]), np.ascontiguousarray(data[:, 4]), data[:, 5].astype(int))
+
+
+NMS_MAX_CANDIDATES = 64  # bounds the pairwise IoU matrix when a frame has many boxes
+
+
+def _nms(xyxy, conf, iou_threshold):
+    # Greedy NMS on a pairwise IoU matrix; returns kept indices, highest confidence first
+    order = np.argsort(-conf, kind="stable")[:NMS_MAX_CANDIDATES]
+    boxes = xyxy[order]
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    top_left = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    bottom_right = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    overlap = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+    iou = overlap / (area[:, None] + area[None, :] - overlap + 1e-9)
+    suppressed = np.triu(iou > iou_threshold, k=1)
+    keep = np.ones(len(boxes), dtype=bool)
+    for i in range(len(boxes)):
+        if keep[i]:
+            keep &= ~suppressed[i]
+    return order[keep]
+
+
+def postprocess(detections, classes=None, top_k=0, agnostic_iou=0.0):
+    # Array-only filtering after the model: allowed classes, class-agnostic NMS (one box per
+    # hand even when two letters fire on it), then the top_k most confident boxes
+    xyxy, conf, cls = detections
+    if classes is not None and len(cls):
+        keep = np.isin(cls, classes)
+        xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+    if agnostic_iou and len(cls) > 1:
+        keep = _nms(xyxy, conf, agnostic_iou)
+    elif top_k and len(cls) > top_k:
+        keep = np.argsort(-conf, kind="stable")
+    else:
+        return Detections(xyxy, conf, cls)
+    if top_k:
+        keep = keep[:top_k]
+    return Detections(xyxy[keep], conf[keep], cls[keep])
+
+
+# --- Runtime export ---
+# best.pt can be exported to faster CPU runtimes. Exports are cached per checkpoint
+# hash, so replacing best.pt triggers a fresh export and old artifacts are never reused.
+RUNTIMES = ("torch", "onnx", "openvino")
+
+# Where each runtime's artifact lands inside the export directory
+_EXPORT_TARGETS = {"onnx": "best.onnx", "openvino": "best_openvino_model"}
+
+
+def checkpoint_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def available_runtimes():
+    runtimes = ["torch"]
+    if importlib.util.find_spec("onnxruntime"):
+        runtimes.append("onnx")
+    if importlib.util.find_spec("openvino"):
+        runtimes.append("openvino")
+    return runtimes
+
+
+def export_model(weights="best.pt", runtime="onnx", imgsz=640, cache_dir=".model_cache"):
+    if runtime == "torch":
+        return weights
+    if runtime not in _EXPORT_TARGETS:
+        raise ValueError(f"Unknown runtime '{runtime}', expected one of {RUNTIMES}")
+
+    export_dir = os.path.join(cache_dir, f"{checkpoint_hash(weights)}-{runtime}-{imgsz}")
+    target = os.path.join(export_dir, _EXPORT_TARGETS[runtime])
+    if os.path.exists(target):
+        return target
+
+    # Export inside a private staging directory and move it into place in one step,
+    # so concurrent replicas never load a half-written artifact
+    from ultralytics import YOLO
+
+    os.makedirs(cache_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=cache_dir, prefix=".export-")
+    try:
+        staged_weights = os.path.join(staging, "best.pt")
+        shutil.copyfile(weights, staged_weights)
+        # dynamic axes: the batch size and input size vary (batched sessions, smaller crops).
+        # simplify=False: ONNX simplification needs onnxslim, which is not in requirements.txt and
+        # ultralytics would try to pip-install at runtime; onnxruntime folds the graph itself on load
+        options = {"simplify": False} if runtime == "onnx" else {}
+        YOLO(staged_weights).export(format=runtime, imgsz=imgsz, dynamic=True, verbose=False, **options)
+        os.remove(staged_weights)
+        try:
+            os.replace(staging, export_dir)
+        except OSError:
+            # Another process finished the same export first
+            if not os.path.exists(target):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return target
+
+
+# --- Shared batched inference ---
+# One worker thread owns the YOLO model. Detectors submit frames, the worker gathers
+# whatever arrives within a short window (or until every active session has sent a
+# frame) and runs them as a single batched predict, then hands each result back.
+class InferenceBroker:
+    def __init__(self, model, max_batch=8, window_ms=8, timings=None):
+        self.model = model
+        self.max_batch = max(1, int(max_batch))
+        self.window = window_ms / 1000
+        self.timings = timings  # optional StageTimings for the model's preprocess/inference/NMS split
+
+        self.batches = 0
+        self.frames = 0
+        self.active_sessions = 0
+
+        self._requests = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="insignia-inference", daemon=True)
+        self._worker.start()
+
+    def register(self):
+        with self._lock:
+            self.active_sessions += 1
+
+    def unregister(self):
+        with self._lock:
+            self.active_sessions = max(0, self.active_sessions - 1)
+
+    def submit(self, img, imgsz=640, conf=0.25):
+        future = Future()
+        self._requests.put((img, imgsz, conf, future))
+        return future
+
+    def predict(self, img, imgsz=640, conf=0.25, timeout=None):
+        return self.submit(img, imgsz, conf).result(timeout)
+
+    def _collect(self):
+        batch = [self._requests.get()]
+        # No point waiting for more frames than there are sessions to send them
+        wanted = min(self.max_batch, max(1, self.active_sessions))
+        deadline = time.monotonic() + self.window
+        while len(batch) < wanted:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Anything already waiting rides along for free
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+
+            # Frames can only share a forward pass at the same input size
+            groups = {}
+            for request in batch:
+                groups.setdefault(request[1], []).append(request)
+
+            for imgsz, requests in groups.items():
+                # Run at the loosest threshold in the batch, then apply each session's own threshold
+                conf = min(request[2] for request in requests)
+                try:
+                    results = self.model.predict([request[0] for request in requests], imgsz=imgsz, conf=conf, verbose=False)
+                except Exception as e:
+                    for request in requests:
+                        request[3].set_exception(e)
+                    continue
+
+                self.batches += 1
+                self.frames += len(requests)
+                if self.timings and results:
+                    # Batch timings are already per image; one record per batch keeps this off the per-frame path
+                    for stage, seconds in model_speed(results[0]).items():
+                        self.timings.record(stage, seconds)
+                for (_, _, session_conf, future), result in zip(requests, results):
+                    future.set_result(to_detections(result, session_conf if session_conf > conf else None))
+
+    def stats(self):
+        return {
+            "active_sessions": self.active_sessions,
+            "batches": self.batches,
+            "frames": self.frames,
+            "mean_batch": self.frames / self.batches if self.batches else 0.0,
+        }
+
+
+# --- Process-pool inference ---
+# Runs inference in separate worker processes so hosts with many cores are not
+# limited by one interpreter's GIL. Each worker loads the weights once. Frames are
+# copied into shared-memory slots and only the slot index travels through the task
+# queue; workers send back the small Detections arrays. If a worker fails to load the
+# model or dies, every pending and later request fails with that error instead of hanging.
+def _pool_worker(model_path, slot_names, tasks, results, threads):
+    # Keep each worker's torch thread pool small so N workers don't oversubscribe the CPU
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        from ultralytics import YOLO
+
+        torch.set_num_threads(threads)
+        model = YOLO(model_path, task="detect")
+    except Exception as e:
+        # A request id of None reports a worker-level failure to the parent
+        results.put((None, None, None, f"Model load failed: {type(e).__name__}: {e}"))
+        raise SystemExit(1)
+
+    # Spawned workers share the parent's resource tracker, so attaching only re-registers names it
+    # already holds; the parent unlinks them on close(), or the tracker does if the server dies
+    blocks = [shared_memory.SharedMemory(name=name) for name in slot_names]
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        request_id, slot, shape, imgsz, conf = task
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=blocks[slot].buf)
+        try:
+            result = model.predict(frame, imgsz=imgsz, conf=conf, verbose=False)[0]
+            results.put((request_id, to_detections(result), model_speed(result), None))
+        except Exception as e:
+            results.put((request_id, None, None, f"{type(e).__name__}: {e}"))
+
+    for block in blocks:
+        block.close()
+
+
+class ProcessPoolBackend:
+    def __init__(self, model_path="best.pt", workers=None, max_frame_shape=(1080, 1920, 3), slots_per_worker=2, timings=None, timeout=30):
+        cpu_count = os.cpu_count() or 1
+        self.timings = timings
+        self.timeout = timeout  # seconds to wait for a free slot or a result
+        self.workers = max(1, int(workers or cpu_count))
+        self.frame_bytes = int(np.prod(max_frame_shape))
+
+        self.active_sessions = 0
+        self.frames = 0
+
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._ids = itertools.count()
+        self._error = None
+        self._closing = False
+
+        self._slots = [shared_memory.SharedMemory(create=True, size=self.frame_bytes) for _ in range(self.workers * slots_per_worker)]
+        self._free_slots = queue.Queue()
+        for slot in range(len(self._slots)):
+            self._free_slots.put(slot)
+
+        # spawn: torch is not fork-safe, and it matches the Windows default
+        context = multiprocessing.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        threads = max(1, cpu_count // self.workers)
+        slot_names = [block.name for block in self._slots]
+        self._processes = [
+            context.Process(target=_pool_worker, args=(model_path, slot_names, self._tasks, self._results, threads), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for process in self._processes:
+            process.start()
+
+        self._collector = threading.Thread(target=self._collect_results, name="insignia-pool-results", daemon=True)
+        self._collector.start()
+        atexit.register(self.close)
+
+    def register(self):
+        with self._lock:
+            self.active_sessions += 1
+
+    def unregister(self):
+        with self._lock:
+            self.active_sessions = max(0, self.active_sessions - 1)
+
+    def submit(self, img, imgsz=640, conf=0.25):
+        if img.dtype != np.uint8 or img.nbytes > self.frame_bytes:
+            raise ValueError(f"Frame {img.shape} {img.dtype} does not fit a {self.frame_bytes}-byte shared-memory slot")
+
+        if self._error:
+            raise RuntimeError(self._error)
+        try:
+            slot = self._free_slots.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No free inference slot within {self.timeout} s")
+        np.ndarray(img.shape, dtype=np.uint8, buffer=self._slots[slot].buf)[...] = img
+
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            self._futures[request_id] = (future, slot)
+        self._tasks.put((request_id, slot, img.shape, imgsz, conf))
+        return future
+
+    def predict(self, img, imgsz=640, conf=0.25, timeout=None):
+        return self.submit(img, imgsz, conf).result(self.timeout if timeout is None else timeout)
+
+    @property
+    def error(self):
+        # Set once a worker failed to load or died; the pool stays unusable after that
+        return self._error
+
+    def _fail(self, error):
+        # The backend is unusable from here on: fail what is in flight and refuse new work
+        with self._lock:
+            self._error = self._error or error
+            pending = list(self._futures.values())
+            self._futures.clear()
+        for future, slot in pending:
+            self._free_slots.put(slot)
+            future.set_exception(RuntimeError(self._error))
+
+    def _check_workers(self):
+        if self._closing or self._error:
+            return
+        for process in self._processes:
+            if process.exitcode is not None:
+                self._fail(f"Inference worker {process.pid} exited with code {process.exitcode}")
+                return
+
+    def _collect_results(self):
+        while True:
+            try:
+                message = self._results.get(timeout=1)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if message is None:
+                break
+            request_id, detections, speed, error = message
+            if request_id is None:
+                self._fail(error)
+                continue
+            with self._lock:
+                entry = self._futures.pop(request_id, None)
+                self.frames += 1
+            if entry is None:
+                continue  # already failed by _fail()
+            future, slot = entry
+            self._free_slots.put(slot)
+            if self.timings and speed:
+                for stage, seconds in speed.items():
+                    self.timings.record(stage, seconds)
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(detections)
+
+    def close(self):
+        if not self._processes:
+            return
+        self._closing = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+        self._processes = []
+        self._results.put(None)
+        for block in self._slots:
+            block.close()
+            block.unlink()
+
+    def stats(self):
+        return {
+            "active_sessions": self.active_sessions,
+            "workers": self.workers,
+            "frames": self.frames,
+            "pending": len(self._futures),
+        }
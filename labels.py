@@ -0,0 +1,77 @@
+# SIBI label table: class index <-> letter, built once per process from data.yaml
+import string
+from functools import lru_cache
+from types import MappingProxyType
+
+import cv2
+import numpy as np
+import yaml
+
+# Overlay style used for every label drawn on the camera feed
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_SCALE = 1.5
+LABEL_THICKNESS = 3
+
+
+class LabelTable:
+    def __init__(self, names):
+        self.names = tuple(names)
+        self.by_index = MappingProxyType(dict(enumerate(self.names)))
+        self.by_letter = MappingProxyType({name: index for index, name in enumerate(self.names)})
+        # Glyphs are rasterized once per (label, color); drawing is then a masked copy (cv2.copyTo),
+        # which is cheaper than re-running cv2.putText's stroke rasterizer on every frame
+        self._sprites = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def letter(self, index, default="?"):
+        return self.by_index.get(index, default)
+
+    def index(self, letter, default=None):
+        return self.by_letter.get(letter, default)
+
+    def sprite(self, index, color):
+        key = (index, color)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = self._sprites[key] = self._render(self.letter(index), color)
+        return sprite
+
+    @staticmethod
+    def _render(text, color):
+        (width, height), baseline = cv2.getTextSize(text, LABEL_FONT, LABEL_SCALE, LABEL_THICKNESS)
+        pad = LABEL_THICKNESS
+        patch = np.zeros((height + baseline + 2 * pad, width + 2 * pad, 3), dtype=np.uint8)
+        cv2.putText(patch, text, (pad, pad + height), LABEL_FONT, LABEL_SCALE, color, LABEL_THICKNESS)
+        mask = patch.any(axis=2).astype(np.uint8)
+        # (dy, dx) shifts cv2.putText's org (baseline, left) to the patch's top-left corner
+        return patch, mask, -(pad + height), -pad
+
+    def draw(self, img, index, org, color):
+        patch, mask, dy, dx = self.sprite(index, color)
+        top, left = org[1] + dy, org[0] + dx
+        # Clip to the frame so labels near the edge are cut off rather than skipped
+        y0, x0 = max(top, 0), max(left, 0)
+        y1, x1 = min(top + patch.shape[0], img.shape[0]), min(left + patch.shape[1], img.shape[1])
+        if y0 >= y1 or x0 >= x1:
+            return
+        sy, sx = slice(y0 - top, y1 - top), slice(x0 - left, x1 - left)
+        cv2.copyTo(patch[sy, sx], mask[sy, sx], img[y0:y1, x0:x1])
+
+
+def _default_names():
+    # A-Y without J and Z (those two letters are signed with motion)
+    return [c for c in string.ascii_uppercase if c not in ['J', 'Z']]
+
+
+@lru_cache(maxsize=None)
+def get_label_table(data_yaml="data.yaml"):
+    try:
+        with open(data_yaml) as f:
+            names = yaml.safe_load(f)["names"]
+        if isinstance(names, dict):
+            names = [names[key] for key in sorted(names)]
+    except (OSError, KeyError, TypeError, yaml.YAMLError):
+        names = _default_names()
+    return LabelTable(names)
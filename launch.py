@@ -0,0 +1,17 @@
+# Process entry point for deployments:
+#   python launch.py [streamlit run options, e.g. --server.port 8501]
+# `streamlit run app.py` only executes app.py when a browser session connects, so a fresh
+# replica would neither warm the model up nor answer GET /ready until someone visited it.
+# This starts warm-up and the health/metrics endpoints first, then runs Streamlit in the same
+# process, where app.py picks up the same backend and warm-up through serving.py.
+import sys
+
+import serving
+
+if __name__ == "__main__":
+    serving.start_serving()
+
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", "app.py", *sys.argv[1:]]
+    sys.exit(stcli.main())
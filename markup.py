@@ -0,0 +1,101 @@
+# Static page markup: the stylesheet and the card grids of the landing and features pages.
+# app.py is executed again on every rerun but this module is imported once per process,
+# so these strings are built once and a rerun only sends them.
+import os
+
+_styles = {}  # path -> (mtime, "<style>...</style>")
+
+
+def stylesheet(path="style.css"):
+    # Re-read only when the file changes, so editing style.css still shows up without a restart
+    mtime = os.stat(path).st_mtime_ns
+    cached = _styles.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as f:
+            cached = _styles[path] = (mtime, f"<style>{f.read()}</style>")
+    return cached[1]
+
+
+# --- Landing page ---
+LANDING_FEATURES = [
+    {"icon": "⚡", "title": "Deteksi Real-time", "desc": "Mendeteksi dan menerjemahkan Bahasa Isyarat SIBI secara instan dengan model YOLO terbaru, memberikan respons cepat untuk komunikasi yang lancar."},
+    {"icon": "🤖", "title": "Kecerdasan Buatan Canggih", "desc": "Ditenagai oleh teknologi AI mutakhir dari Azure, memastikan akurasi dan keandalan yang luar biasa dalam setiap terjemahan."},
+    {"icon": "🌐", "title": "Solusi Multi-Modal", "desc": "Mendukung input visual (kamera), suara (mikrofon), dan teks, serta dilengkapi Chatbot interaktif untuk pengalaman komunikasi yang komprehensif."}
+]
+
+LANDING_STEPS = [
+    {"num": "1", "title": "Input", "desc": "Pengguna memasukkan bahasa isyarat melalui kamera atau suara melalui mikrofon."},
+    {"num": "2", "title": "Proses AI", "desc": "Sistem AI canggih kami mengenali isyarat visual atau ucapan, lalu menerjemahkannya secara cerdas."},
+    {"num": "3", "title": "Output", "desc": "Hasil terjemahan ditampilkan secara instan dalam format teks yang mudah dipahami atau visual isyarat."}
+]
+
+LANDING_TESTIMONIALS = [
+    {"name": "Budi Santoso", "role": "Guru SLB", "quote": "InSignia sangat membantu siswa saya dalam belajar bahasa isyarat. Prosesnya jadi lebih interaktif dan menyenangkan, mendorong mereka untuk lebih aktif berkomunikasi. Benar-benar alat yang revolusioner di kelas."},
+    {"name": "Siti Aminah", "role": "Profesional HRD", "quote": "Sebagai HRD, saya sangat menghargai kemudahan komunikasi dengan rekan tuli di perusahaan. Antarmuka InSignia yang intuitif telah meningkatkan inklusivitas dan kolaborasi tim secara signifikan."},
+    {"name": "Dr. Rina Dewi", "role": "Dokter Umum", "quote": "Memberikan pelayanan kesehatan yang inklusif adalah prioritas. InSignia adalah alat vital yang memungkinkan saya berinteraksi lebih efektif dengan pasien tunarungu, memastikan mereka mendapatkan penanganan yang layak dan nyaman."}
+]
+
+
+def _feature_card(feature):
+    return f"""
+    <div class="card">
+        <div style="font-size: 3rem; margin-bottom: 1.5rem; color: var(--primary);">{feature['icon']}</div>
+        <h3>{feature['title']}</h3>
+        <p style="line-height: 1.7; color: var(--text-light); opacity: 0.9;">{feature['desc']}</p>
+    </div>
+    """
+
+
+def _step_card(step):
+    return f"""
+    <div class="card">
+        <div style="background: var(--primary-light); width: 70px; height: 70px; border-radius: 50%; display: flex; align-items: center; justify-content: center; margin-bottom: 1.5rem; color: var(--white); font-size: 2rem; font-weight: bold; box-shadow: 0 5px 15px rgba(var(--primary-light-rgb), 0.3);">
+            {step['num']}
+        </div>
+        <h3>{step['title']}</h3>
+        <p style="line-height: 1.7; color: var(--text-light); opacity: 0.9;">{step['desc']}</p>
+    </div>
+    """
+
+
+def _testimonial_card(testimonial):
+    return f"""
+    <div class="testimonial card">
+        <p style="font-style: italic; margin-bottom: 1.5rem; line-height: 1.7; color: var(--text-color);">
+            "{testimonial['quote']}"
+        </p>
+        <div>
+            <p style="font-weight: bold; color: var(--primary); margin-bottom: 0.25rem; font-size: 1.1rem;">{testimonial['name']}</p>
+            <p style="font-size: 0.95rem; color: var(--text-light); opacity: 0.8;">{testimonial['role']}</p>
+        </div>
+    </div>
+    """
+
+
+LANDING_FEATURE_CARDS = tuple(_feature_card(feature) for feature in LANDING_FEATURES)
+LANDING_STEP_CARDS = tuple(_step_card(step) for step in LANDING_STEPS)
+LANDING_TESTIMONIAL_CARDS = tuple(_testimonial_card(testimonial) for testimonial in LANDING_TESTIMONIALS)
+
+
+# --- Features page ---
+# "page" is the router key the card's button opens
+FEATURE_PAGES = [
+    {"icon": "📷", "title": "Deteksi Real-time", "description": "Deteksi Bahasa Isyarat SIBI secara langsung melalui kamera perangkat Anda dengan akurasi tinggi, mengubah isyarat menjadi teks secara instan.", "key": "open_detect", "page": "📷 Deteksi", "color": "#4A63E0"}, # primary
+    {"icon": "📚", "title": "Kamus SIBI Interaktif", "description": "Pelajari Bahasa Isyarat SIBI dengan panduan visual lengkap, ilustrasi interaktif, dan contoh penggunaan untuk memperkaya pemahaman Anda.", "key": "open_dict", "page": "📚 Kamus", "color": "#EE5F8E"}, # secondary
+    {"icon": "🎤", "title": "Speech to Visual", "description": "Konversikan ucapan Anda menjadi visual Bahasa Isyarat SIBI, memungkinkan komunikasi dua arah yang lancar antara pengguna bahasa isyarat dan teman bicara mereka.", "key": "open_speech", "page": "🎤 Speech to Visual", "color": "#7209B7"}, # purple
+    {"icon": "💬", "title": "Chatbot InSignia", "description": "Dapatkan bantuan instan, informasi mendalam, dan panduan praktis seputar Bahasa Isyarat SIBI dan komunikasi inklusif dari chatbot cerdas kami.", "key": "open_chat", "page": "💬 Chatbot", "color": "#FFD23F"} # accent
+]
+
+
+def _feature_page_card(feature):
+    return f"""
+    <div class="card" style="border-top: 5px solid {feature['color']};">
+        <div style="font-size: 3rem; margin-bottom: 1.5rem; color: {feature['color']};">{feature['icon']}</div>
+        <h3>{feature['title']}</h3>
+        <p style="margin-bottom: 1.5rem; color: var(--text-light); line-height: 1.7;">{feature['description']}</p>
+        <div style="margin-top: auto; width: 100%;"> </div>
+    </div>
+    """
+
+
+FEATURE_PAGE_CARDS = tuple(_feature_page_card(feature) for feature in FEATURE_PAGES)
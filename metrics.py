@@ -0,0 +1,38 @@
+# Prometheus metrics for the detection pipeline. Collectors are registered once, when this
+# module is first imported, and every camera session in the process feeds the same series.
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5)
+
+FRAMES_PROCESSED = Counter("insignia_frames_processed_total", "Camera frames annotated and sent back")
+FRAMES_INFERRED = Counter("insignia_frames_inferred_total", "Camera frames that went through the model")
+# reason="queued": backlog discarded before processing; reason="stale": too old to run the model on
+FRAMES_DROPPED = Counter("insignia_frames_dropped_total", "Camera frames dropped, by reason", ["reason"])
+ACTIVE_SESSIONS = Gauge("insignia_active_sessions", "Camera sessions currently streaming")
+# Quantiles come from the buckets, e.g. histogram_quantile(0.95, rate(insignia_inference_seconds_bucket[5m]))
+INFERENCE_SECONDS = Histogram("insignia_inference_seconds", "Time a detector waits for inference results per frame", buckets=LATENCY_BUCKETS)
+STAGE_SECONDS = Histogram("insignia_stage_seconds", "Time per detection pipeline stage", ["stage"], buckets=LATENCY_BUCKETS)
+
+_stage_children = {}  # stage -> labelled child, so the per-frame path skips the label lookup
+
+
+def observe_stage(stage, seconds):
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children[stage] = STAGE_SECONDS.labels(stage)
+    child.observe(seconds)
+    if stage == "inference":
+        INFERENCE_SECONDS.observe(seconds)
+        FRAMES_INFERRED.inc()
+    elif stage == "total":
+        FRAMES_PROCESSED.inc()
+
+
+def observe_drop(reason, count):
+    if count:
+        FRAMES_DROPPED.labels(reason).inc(count)
+
+
+def serve_metrics(port, host="0.0.0.0"):
+    # Separate port from Streamlit: GET /metrics in the Prometheus text format
+    return start_http_server(port, host)
@@ -0,0 +1,26 @@
+# Build timings for the lazily created, process-wide resources (the get_* factories in app.py and serving.py).
+# A factory runs once per process, on first use by the page that needs it; its duration is
+# kept here so the cost of each heavy resource shows up separately from a plain rerun.
+import functools
+import time
+
+_build_seconds = {}
+
+
+def timed(name):
+    def decorate(factory):
+        @functools.wraps(factory)
+        def build(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return factory(*args, **kwargs)
+            finally:
+                _build_seconds[name] = time.perf_counter() - started
+
+        return build
+
+    return decorate
+
+
+def build_times():
+    return dict(_build_seconds)
@@ -0,0 +1,151 @@
+# Process-wide model serving: the shared inference backend, its warm-up and the /ready and
+# /metrics endpoints. Streamlit only executes app.py once a browser session connects, so these
+# live outside it: launch.py starts them when the process starts, and app.py uses the same
+# objects (every factory here builds its object once per process, like st.cache_resource).
+import functools
+import os
+import threading
+
+from dotenv import load_dotenv
+
+import metrics
+import resources
+from health import ModelWarmup, serve_health
+from inference import InferenceBroker, ProcessPoolBackend, export_model
+from timings import StageTimings
+
+load_dotenv()
+
+# Inference backend shared by all camera sessions:
+# "batch" = one in-process worker batching frames, "process" = pool of worker processes (multi-core hosts)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "batch").lower()
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", 8))
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", 8))
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 0)) or os.cpu_count()
+
+# Model runtime: "torch" (best.pt as-is), "onnx" or "openvino" (exported once and cached per checkpoint hash).
+# The first start with a new best.pt pays a one-time export (tens of seconds on CPU) before warm-up
+# can finish; later starts load the cached artifact from MODEL_CACHE_DIR.
+INFERENCE_RUNTIME = os.getenv("INFERENCE_RUNTIME", "onnx").lower()
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", ".model_cache")
+
+# Input sizes the detector runs at; hand ROI mode infers on a padded crop around the hand at a smaller size
+DETECTION_IMGSZ = int(os.getenv("DETECTION_IMGSZ", 640))
+DETECTION_ROI_MODE = os.getenv("DETECTION_ROI_MODE", "1") == "1"
+DETECTION_ROI_IMGSZ = int(os.getenv("DETECTION_ROI_IMGSZ", 320))
+
+# Readiness: launch.py loads and warms the model up in the background when the process starts
+# (DETECTION_WARMUP=0 defers it to the first visit of the detection page, which is also when a
+# plain `streamlit run app.py` starts it; no other page touches the model). The state is written
+# to HEALTH_STATUS_PATH, and HEALTH_PORT > 0 also serves GET /ready (200/503) for a load balancer.
+DETECTION_WARMUP = os.getenv("DETECTION_WARMUP", "1") == "1"
+DETECTION_WARMUP_RUNS = int(os.getenv("DETECTION_WARMUP_RUNS", 3))
+# Longest a warm-up inference may take before warm-up fails, and longest the detection page waits for warm-up
+DETECTION_WARMUP_TIMEOUT_S = float(os.getenv("DETECTION_WARMUP_TIMEOUT_S", 60))
+HEALTH_STATUS_PATH = os.getenv("HEALTH_STATUS_PATH", ".health/status.json")
+HEALTH_PORT = int(os.getenv("HEALTH_PORT", 0))
+
+# Prometheus metrics (frames, drops, stage/inference latency, sessions) on GET /metrics when > 0
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+
+def process_wide(factory):
+    # Built on the first call from whichever thread gets there first (warm-up thread or a
+    # session), then shared. A failed build raises and is retried on the next call;
+    # reset() drops a built object that turned out to be broken, so the next call rebuilds it.
+    lock = threading.Lock()
+    built = []
+
+    @functools.wraps(factory)
+    def get():
+        with lock:
+            if not built:
+                built.append(factory())
+            return built[0]
+
+    def peek():
+        return built[0] if built else None
+
+    def reset():
+        with lock:
+            built.clear()
+
+    get.peek = peek
+    get.reset = reset
+    return get
+
+
+# Export best.pt to the configured runtime once per process (the artifact itself is cached on disk),
+# traced at the detector's input size
+@process_wide
+@resources.timed("model_export")
+def get_model_path():
+    try:
+        return export_model("best.pt", INFERENCE_RUNTIME, imgsz=DETECTION_IMGSZ, cache_dir=MODEL_CACHE_DIR), INFERENCE_RUNTIME, None
+    except Exception as e:
+        # Fall back to the PyTorch checkpoint rather than taking the app down
+        return "best.pt", "torch", f"{type(e).__name__}: {e}"
+
+
+# YOLO model for the in-process backend (the process pool loads its own copy per worker)
+@process_wide
+@resources.timed("yolo_model")
+def get_model():
+    from ultralytics import YOLO
+
+    model_path, _, _ = get_model_path()
+    return YOLO(model_path, task="detect")
+
+
+# The model's own preprocess / inference / NMS split, reported by the shared backend
+@process_wide
+def get_model_timings():
+    return StageTimings(sink=metrics.observe_stage)
+
+
+# One inference backend per server process, shared by every session
+@process_wide
+@resources.timed("inference_backend")
+def get_inference_backend():
+    if INFERENCE_BACKEND == "process":
+        model_path, _, _ = get_model_path()
+        return ProcessPoolBackend(model_path, INFERENCE_WORKERS, timings=get_model_timings())
+    return InferenceBroker(get_model(), INFERENCE_MAX_BATCH, INFERENCE_BATCH_WINDOW_MS, timings=get_model_timings())
+
+
+@process_wide
+def get_metrics_server():
+    return metrics.serve_metrics(METRICS_PORT) if METRICS_PORT else None
+
+
+# What each warm-up attempt builds. Every attempt after the first is a retry after a failure,
+# so whatever is known to be broken is dropped first: a process pool whose workers died, or the
+# torch fallback left by a failed export (the export is attempted again, then the backend rebuilt).
+def get_warm_backend():
+    model_path = get_model_path.peek()
+    backend = get_inference_backend.peek()
+    export_failed = model_path is not None and model_path[2] is not None
+    if export_failed or getattr(backend, "error", None):
+        get_inference_backend.reset()
+        if hasattr(backend, "close"):
+            backend.close()
+    if export_failed:
+        get_model_path.reset()
+        get_model.reset()
+    return get_inference_backend()
+
+
+# Warm-up runs on its own thread, so nothing waits for the model unless it asks to
+@process_wide
+def get_model_warmup():
+    sizes = (DETECTION_IMGSZ, DETECTION_ROI_IMGSZ) if DETECTION_ROI_MODE else (DETECTION_IMGSZ,)
+    warmup = ModelWarmup(get_warm_backend, sizes, DETECTION_WARMUP_RUNS, status_path=HEALTH_STATUS_PATH, timeout=DETECTION_WARMUP_TIMEOUT_S)
+    if HEALTH_PORT:
+        serve_health(warmup, HEALTH_PORT)
+    return warmup.start() if DETECTION_WARMUP else warmup
+
+
+def start_serving():
+    # Process start for launch.py; app.py starts the metrics server itself and the warm-up from detection_page
+    get_metrics_server()
+    return get_model_warmup()
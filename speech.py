@@ -0,0 +1,311 @@
+# Speech services: continuous recognition over in-memory PCM (Speech to Visual page) and
+# cached text-to-speech for the detection page
+import hashlib
+import os
+import queue
+import threading
+import unicodedata
+from collections import OrderedDict, namedtuple
+from types import SimpleNamespace
+
+# Audio pushed to the recognizer: 16 kHz, 16-bit, mono PCM
+SAMPLE_RATE = 16000
+BITS_PER_SAMPLE = 16
+CHANNELS = 1
+
+RecognizerSession = namedtuple("RecognizerSession", ["recognizer", "stream", "connection"])
+
+
+def azure_recognizer_factory(speech_config):
+    import azure.cognitiveservices.speech as speechsdk
+
+    def create():
+        stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=SAMPLE_RATE, bits_per_sample=BITS_PER_SAMPLE, channels=CHANNELS)
+        stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+        recognizer = speechsdk.SpeechRecognizer(speech_config=speech_config, audio_config=speechsdk.audio.AudioConfig(stream=stream))
+        # Open the service connection up front so the request itself skips the handshake
+        connection = speechsdk.Connection.from_recognizer(recognizer)
+        connection.open(True)
+        return RecognizerSession(recognizer, stream, connection)
+
+    return create
+
+
+# --- Recognizer pool ---
+# An Azure recognizer is bound to its audio stream, and a push stream ends when it is
+# closed, so a recognizer serves one request. The pool keeps one session ready (built
+# and connected in the background) so each request starts on a warm recognizer.
+class RecognizerPool:
+    def __init__(self, create_session):
+        self._create = create_session
+        self._ready = None
+        self._error = None
+        self._prepared = threading.Event()
+        self._prepare()
+
+    def _prepare(self):
+        self._prepared.clear()
+
+        def build():
+            try:
+                self._ready, self._error = self._create(), None
+            except Exception as e:
+                self._ready, self._error = None, e
+            self._prepared.set()
+
+        threading.Thread(target=build, name="insignia-recognizer-prewarm", daemon=True).start()
+
+    def acquire(self, timeout=10):
+        self._prepared.wait(timeout)
+        session = self._ready
+        self._ready = None
+        if session is None:
+            # Background build failed or is still running: build one inline (raises if the service is unreachable)
+            session = self._create()
+        self._prepare()
+        return session
+
+
+# --- Streaming transcription ---
+# Pushes PCM bytes from memory into the recognizer and yields ("partial", text) while
+# recognition runs, then ("final", text) once the stream has been fully recognized.
+# Continuous recognition keeps going past the first pause, so long audio is not cut off.
+class StreamingTranscriber:
+    def __init__(self, pool, chunk_bytes=SAMPLE_RATE * 2 // 5):  # 200 ms of audio per write
+        self.pool = pool
+        self.chunk_bytes = chunk_bytes
+
+    def stream(self, pcm, timeout=30):
+        recognizer, stream, _ = self.pool.acquire()
+        events = queue.Queue()
+        # SDK callbacks arrive on SDK threads; hand them to the caller's thread through the queue
+        recognizer.recognizing.connect(lambda evt: events.put(("partial", evt.result.text)))
+        recognizer.recognized.connect(lambda evt: events.put(("segment", evt.result.text)))
+        recognizer.canceled.connect(lambda evt: events.put(("error", evt.error_details) if evt.error_details else ("stopped", None)))
+        recognizer.session_stopped.connect(lambda evt: events.put(("stopped", None)))
+
+        recognizer.start_continuous_recognition_async().get()
+        try:
+            for start in range(0, len(pcm), self.chunk_bytes):
+                stream.write(pcm[start:start + self.chunk_bytes])
+            stream.close()  # end of audio: the recognizer finishes the last segment and stops the session
+
+            segments = []
+            while True:
+                try:
+                    kind, text = events.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No response from speech recognition within {timeout} s")
+                if kind == "partial":
+                    yield "partial", " ".join(segments + [text])
+                elif kind == "segment":
+                    if text:  # NoMatch segments come back empty
+                        segments.append(text)
+                        yield "partial", " ".join(segments)
+                elif kind == "error":
+                    raise RuntimeError(text)
+                else:
+                    break
+        finally:
+            recognizer.stop_continuous_recognition_async().get()
+
+        yield "final", " ".join(segments)
+
+
+# --- Text to speech ---
+# Synthesizes into memory (no audio device on the server) so the page can hand the bytes
+# to st.audio. Results are cached on disk, keyed by (normalized text, voice, format), and
+# the cache is trimmed least-recently-played first once it passes max_bytes. File mtimes
+# record last use, so the LRU order survives restarts.
+TTS_MIME_TYPES = {"Mp3": "audio/mpeg", "Riff": "audio/wav", "Ogg": "audio/ogg", "Webm": "audio/webm"}
+
+
+def tts_mime_type(output_format):
+    return next((mime for marker, mime in TTS_MIME_TYPES.items() if marker in output_format), "application/octet-stream")
+
+
+def azure_synthesizer_factory(speech_config, output_format="Audio16Khz32KBitRateMonoMp3"):
+    import azure.cognitiveservices.speech as speechsdk
+
+    def create():
+        speech_config.set_speech_synthesis_output_format(getattr(speechsdk.SpeechSynthesisOutputFormat, output_format))
+        synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+
+        def synthesize(text):
+            result = synthesizer.speak_text_async(text).get()
+            if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+                details = result.cancellation_details
+                raise RuntimeError(f"{result.reason}: {details.error_details if details else ''}")
+            return result.audio_data
+
+        return synthesize
+
+    return create
+
+
+def normalize_tts_text(text):
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class SpeechSynthesisService:
+    def __init__(self, create_synthesizer, voice, output_format, cache_dir=".tts_cache", max_bytes=100 * 2**20):
+        self._create = create_synthesizer
+        self._synthesize = None  # built on the first cache miss, then reused
+        self.voice = voice
+        self.output_format = output_format
+        self.mime_type = tts_mime_type(output_format)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()             # guards _files; never held across a network call
+        self._synthesis_lock = threading.Lock()   # one synthesis at a time on the shared synthesizer
+        self._files = OrderedDict()   # file name -> size, least recently used first
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith(".audio")]
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            self._files[entry.name] = entry.stat().st_size
+
+    def _key(self, text):
+        return hashlib.sha1(f"{text}|{self.voice}|{self.output_format}".encode()).hexdigest() + ".audio"
+
+    def _evict(self):
+        total = sum(self._files.values())
+        while total > self.max_bytes and len(self._files) > 1:
+            name, size = self._files.popitem(last=False)
+            total -= size
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def _cached(self, name):
+        with self._lock:
+            if name not in self._files:
+                return None
+            self._files.move_to_end(name)
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._files.pop(name, None)  # removed behind our back (or just evicted): synthesize again
+            return None
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def synthesize(self, text):
+        text = normalize_tts_text(text)
+        if not text:
+            return b""
+        name = self._key(text)
+        # Cache hits never wait for another session's cloud round-trip
+        audio = self._cached(name)
+        if audio is not None:
+            return audio
+
+        with self._synthesis_lock:
+            # The same phrase may have been synthesized while this call waited
+            audio = self._cached(name)
+            if audio is not None:
+                return audio
+            if self._synthesize is None:
+                self._synthesize = self._create()
+            audio = self._synthesize(text)
+
+        path = os.path.join(self.cache_dir, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(audio)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.misses += 1
+            self._files[name] = len(audio)
+            self._evict()
+        return audio
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._files),
+            "bytes": sum(self._files.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# --- Local fake recognizer ---
+# Same surface as the parts of SpeechRecognizer / PushAudioInputStream used above.
+# Once the audio stream is closed it replays canned (event, text) pairs, where event
+# is "recognizing", "recognized" or "canceled", then stops the session.
+class _Signal:
+    def __init__(self):
+        self._callbacks = []
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def fire(self, evt):
+        for callback in self._callbacks:
+            callback(evt)
+
+
+class _Done:
+    def get(self):
+        return None
+
+
+class FakePushStream:
+    def __init__(self, on_close):
+        self.data = bytearray()
+        self.closed = False
+        self._on_close = on_close
+
+    def write(self, data):
+        self.data += data
+
+    def close(self):
+        self.closed = True
+        self._on_close()
+
+
+class FakeRecognizer:
+    def __init__(self, events):
+        self.events = list(events)
+        self.recognizing = _Signal()
+        self.recognized = _Signal()
+        self.canceled = _Signal()
+        self.session_stopped = _Signal()
+        self.started = False
+
+    def start_continuous_recognition_async(self):
+        self.started = True
+        return _Done()
+
+    def stop_continuous_recognition_async(self):
+        self.started = False
+        return _Done()
+
+    def replay(self):
+        def run():
+            for kind, text in self.events:
+                if kind == "canceled":
+                    self.canceled.fire(SimpleNamespace(error_details=text))
+                    return
+                getattr(self, kind).fire(SimpleNamespace(result=SimpleNamespace(text=text)))
+            self.session_stopped.fire(SimpleNamespace())
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+def fake_recognizer_factory(events):
+    def create():
+        recognizer = FakeRecognizer(events)
+        return RecognizerSession(recognizer, FakePushStream(recognizer.replay), None)
+
+    return create
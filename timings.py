@@ -0,0 +1,70 @@
+# Low-overhead latency histograms for the detection pipeline stages
+import bisect
+
+# Fixed log-spaced buckets, each 12% wider than the last, from 50 µs to ~10 s. Recording is
+# a bisect plus an increment, memory stays constant however long a session runs, and a
+# quantile read from the counts is accurate to one bucket width.
+BUCKET_BOUNDS = tuple(50e-6 * 1.12 ** i for i in range(109))
+
+# Stages of one camera frame, in pipeline order. preprocess/model/postprocess (NMS) come
+# from the model's own per-image timings; "inference" is the detector's full wait for results.
+PIPELINE_STAGES = ("decode", "mirror", "inference", "preprocess", "model", "postprocess", "draw", "encode", "total")
+
+
+class LatencyHistogram:
+    def __init__(self, bounds=BUCKET_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th sample
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                break
+        return self.bounds[min(i, len(self.bounds) - 1)]
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class StageTimings:
+    def __init__(self, stages=PIPELINE_STAGES, smoothing=0.1, sink=None):
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+        self.recent = {}  # stage -> exponential moving average, for live overlays
+        self.smoothing = smoothing
+        self.sink = sink  # optional sink(stage, seconds), e.g. process-wide Prometheus metrics
+
+    def record(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(seconds)
+        previous = self.recent.get(stage)
+        self.recent[stage] = seconds if previous is None else previous + self.smoothing * (seconds - previous)
+        if self.sink:
+            self.sink(stage, seconds)
+
+    def stats(self):
+        return {
+            stage: {
+                "count": histogram.count,
+                "mean_ms": 1000 * histogram.mean(),
+                "p50_ms": 1000 * histogram.quantile(0.5),
+                "p95_ms": 1000 * histogram.quantile(0.95),
+                "p99_ms": 1000 * histogram.quantile(0.99),
+            }
+            for stage, histogram in self.histograms.items()
+            if histogram.count
+        }
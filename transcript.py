@@ -0,0 +1,102 @@
+# Offline transcription of recorded signing: video file -> letter sequence + SRT subtitles
+#
+# The file is decoded with PyAV as a stream (only the frames in flight are in memory) and
+# sampled at a fixed rate. Frames go to the shared inference backend a batch at a time;
+# every frame of a batch is submitted before any result is awaited, so the batching broker
+# runs them as one forward pass and the process pool spreads them over its workers. The
+# results feed the same LetterDecoder as the live camera, driven by video timestamps.
+import time
+from collections import namedtuple
+
+import cv2
+
+from detection import LetterDecoder
+
+Cue = namedtuple("Cue", ["start", "end", "letter"])
+Transcript = namedtuple("Transcript", ["text", "cues", "frames", "duration", "elapsed"])
+
+
+def iter_frames(source, sample_fps=10, max_width=1280):
+    # Yields (seconds, BGR frame) at most sample_fps times per second of video
+    import av
+
+    with av.open(source) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"  # multi-threaded decoding inside libav
+        next_time = 0.0
+        for frame in container.decode(stream):
+            if frame.time is None or frame.time + 1e-6 < next_time:
+                continue
+            next_time = frame.time + 1 / sample_fps
+            width, height = frame.width, frame.height
+            if width > max_width:
+                # Resize inside the colour conversion; the model input is smaller than this anyway
+                width, height = max_width, int(height * max_width / width) // 2 * 2
+            yield frame.time, frame.to_ndarray(width=width, height=height, format="bgr24")
+
+
+def video_duration(source):
+    import av
+
+    with av.open(source) as container:
+        if container.duration:
+            return container.duration / 1_000_000  # av.time_base is microseconds
+        stream = container.streams.video[0]
+        return float(stream.duration * stream.time_base) if stream.duration else None
+
+
+def transcribe_video(source, backend, labels, imgsz=640, conf=0.6, sample_fps=10, batch_size=16, mirror=True,
+                     decoder_options=None, max_cue=2.0, duration=None, on_progress=None):
+    decoder = LetterDecoder(labels, **(decoder_options or {}))
+    started = time.perf_counter()
+    cues = []
+    frames = 0
+    last_time = 0.0
+
+    def flush(batch):
+        nonlocal frames
+        futures = [backend.submit(img, imgsz=imgsz, conf=conf) for _, img in batch]
+        for (frame_time, _), future in zip(batch, futures):
+            detections = future.result()
+            letter = decoder.update(detections.cls, detections.conf, frame_time)
+            if letter:
+                cues.append([decoder.leader_since, None, letter])
+        frames += len(batch)
+        if on_progress:
+            on_progress(batch[-1][0], frames, decoder.text)
+
+    batch = []
+    for frame_time, img in iter_frames(source, sample_fps):
+        # Same orientation as the live camera, which the model sees mirrored
+        batch.append((frame_time, cv2.flip(img, 1) if mirror else img))
+        last_time = frame_time
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    # A letter's cue lasts until the next one starts, capped at max_cue seconds
+    end_of_video = max(duration or 0.0, last_time)
+    for i, cue in enumerate(cues):
+        next_start = cues[i + 1][0] if i + 1 < len(cues) else end_of_video
+        cue[1] = max(cue[0] + 0.1, min(next_start, cue[0] + max_cue))
+    return Transcript(decoder.text, [Cue(*cue) for cue in cues], frames, end_of_video, time.perf_counter() - started)
+
+
+def _srt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def to_srt(cues):
+    # One subtitle per letter, showing the text spelled so far with the new letter last
+    blocks = []
+    text = ""
+    for i, cue in enumerate(cues, 1):
+        text += cue.letter
+        blocks.append(f"{i}\n{_srt_time(cue.start)} --> {_srt_time(cue.end)}\n{text}\n")
+    return "\n".join(blocks)
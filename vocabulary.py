@@ -0,0 +1,129 @@
+# Kamus SIBI search: prefix trie + trigram index over the sign vocabulary (letters, and
+# word signs once they are added to the vocabulary file), built once and persisted
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import Counter
+
+INDEX_VERSION = 1
+PREFIX_LIMIT = 64  # entry ids kept per trie node; enough for a results grid, keeps the index small
+
+
+def normalize_term(text):
+    # "Terima  Kasih!" -> "terima kasih"; accents dropped so "é" matches "e"
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_vocabulary(labels, path=None):
+    # Letters come from the model's label table; word signs from an optional JSON list of
+    # {"term": "Terima Kasih", "media": "path/to/video-or-image", "description": "..."}
+    entries = [{"term": letter, "kind": "huruf", "class_id": class_id} for class_id, letter in labels.by_index.items()]
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for item in json.load(f):
+                entries.append({"term": item["term"], "kind": "kata", "media": item.get("media"), "description": item.get("description", "")})
+    return entries
+
+
+class SearchIndex:
+    def __init__(self, entries, keys, nodes, prefix_ids, trigrams):
+        self.entries = entries
+        self.keys = keys              # entry id -> normalized term
+        self.nodes = nodes            # trie: node id -> {char: child node id}, node 0 is the root
+        self.prefix_ids = prefix_ids  # node id -> entry ids whose term (or one of its words) starts with that prefix
+        self.trigrams = trigrams      # trigram -> entry ids
+        self.gram_counts = [len(_trigrams(key)) for key in keys]
+
+    @classmethod
+    def build(cls, entries):
+        keys = [normalize_term(entry["term"]) for entry in entries]
+        # Shorter terms first, so a prefix lists "A" before "Apa kabar"
+        order = sorted(range(len(entries)), key=lambda i: (len(keys[i]), keys[i]))
+        nodes, prefix_ids, trigrams = [{}], [[]], {}
+        for entry_id in order:
+            key = keys[entry_id]
+            # Every word start is indexed, so "kasih" finds "Terima Kasih"
+            starts = [0] + [m.end() for m in re.finditer(" ", key)]
+            for start in starts:
+                node = 0
+                for char in key[start:]:
+                    child = nodes[node].get(char)
+                    if child is None:
+                        child = nodes[node][char] = len(nodes)
+                        nodes.append({})
+                        prefix_ids.append([])
+                    node = child
+                    ids = prefix_ids[node]
+                    if len(ids) < PREFIX_LIMIT and (not ids or ids[-1] != entry_id):
+                        ids.append(entry_id)
+            for gram in _trigrams(key):
+                trigrams.setdefault(gram, []).append(entry_id)
+        return cls(entries, keys, nodes, prefix_ids, trigrams)
+
+    def _prefix(self, key):
+        node = 0
+        for char in key:
+            node = self.nodes[node].get(char)
+            if node is None:
+                return []
+        return self.prefix_ids[node]
+
+    def search(self, query, limit=24, min_similarity=0.35):
+        # Ranked: exact term, then prefix matches (shortest first), then typo-tolerant
+        # trigram matches by Dice similarity. Returns [(score, entry)].
+        key = normalize_term(query)
+        if not key:
+            return []
+        scores = {}
+        for entry_id in self._prefix(key):
+            exact = self.keys[entry_id] == key
+            scores[entry_id] = 3.0 if exact else 2.0 - len(self.keys[entry_id]) / 1000
+
+        if len(key) >= 3 or not scores:
+            grams = _trigrams(key)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self.trigrams.get(gram, ()))
+            for entry_id, count in shared.items():
+                if entry_id not in scores:
+                    similarity = 2 * count / (len(grams) + self.gram_counts[entry_id])
+                    if similarity >= min_similarity:
+                        scores[entry_id] = similarity
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.keys[item[0]]))[:limit]
+        return [(score, self.entries[entry_id]) for entry_id, score in ranked]
+
+    def to_json(self):
+        return {"entries": self.entries, "keys": self.keys, "nodes": self.nodes, "prefix_ids": self.prefix_ids, "trigrams": self.trigrams}
+
+
+def load_index(entries, cache_dir=".catalog_cache"):
+    # Rebuilt only when the vocabulary changes (signature = hash of the entries)
+    signature = hashlib.sha1(json.dumps(entries, sort_keys=True).encode()).hexdigest()
+    path = os.path.join(cache_dir, "vocabulary-index.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == INDEX_VERSION and data.get("signature") == signature:
+            index = data["index"]
+            # JSON object keys are strings; trie edges are single characters so they load as-is
+            return SearchIndex(index["entries"], index["keys"], index["nodes"], index["prefix_ids"], index["trigrams"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = SearchIndex.build(entries)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": INDEX_VERSION, "signature": signature, "index": index.to_json()}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return index